@@ -9,6 +9,9 @@ const AdminDashboard = () => {
   const { isAuthenticated, user, loading: authLoading } = useAuth();
   const [contests, setContests] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [statusFilter, setStatusFilter] = useState('');
+  const [page, setPage] = useState(1);
+  const [totalPages, setTotalPages] = useState(1);
   const navigate = useNavigate();
 
   useEffect(() => {
@@ -25,8 +28,10 @@ const AdminDashboard = () => {
         const token = localStorage.getItem('access_token');
         const response = await axios.get('http://localhost:8000/api/contests/admin/dashboard/', {
           headers: { Authorization: `Bearer ${token}` },
+          params: { page, ...(statusFilter ? { status: statusFilter } : {}) },
         });
         setContests(response.data.contests || []);
+        setTotalPages(response.data.total_pages || 1);
       } catch (error) {
         console.error('Failed to fetch contests:', error);
       } finally {
@@ -35,7 +40,7 @@ const AdminDashboard = () => {
     };
 
     fetchContests();
-  }, [authLoading, isAuthenticated, user, navigate]);
+  }, [authLoading, isAuthenticated, user, navigate, page, statusFilter]);
 
   const handleDelete = async (contestId) => {
     try {
@@ -57,9 +62,25 @@ const AdminDashboard = () => {
       <div className="container mx-auto py-12 px-4">
         <div className="flex justify-between items-center mb-8">
           <h1 className="text-3xl font-bold">Admin Dashboard</h1>
-          <Button asChild>
-            <Link to="/admin/contest/create">Create Contest</Link>
-          </Button>
+          <div className="flex gap-4 items-center">
+            <select
+              value={statusFilter}
+              onChange={(e) => {
+                setStatusFilter(e.target.value);
+                setPage(1);
+              }}
+              className="p-2 border rounded"
+              aria-label="Filter contests by status"
+            >
+              <option value="">All contests</option>
+              <option value="upcoming">Upcoming</option>
+              <option value="ongoing">Ongoing</option>
+              <option value="completed">Completed</option>
+            </select>
+            <Button asChild>
+              <Link to="/admin/contest/create">Create Contest</Link>
+            </Button>
+          </div>
         </div>
         <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
           {contests.map((contest) => (
@@ -83,6 +104,17 @@ const AdminDashboard = () => {
             </div>
           ))}
         </div>
+        {totalPages > 1 && (
+          <div className="flex justify-center items-center gap-4 mt-8">
+            <Button variant="outline" disabled={page <= 1} onClick={() => setPage(page - 1)}>
+              Previous
+            </Button>
+            <span>Page {page} of {totalPages}</span>
+            <Button variant="outline" disabled={page >= totalPages} onClick={() => setPage(page + 1)}>
+              Next
+            </Button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -14,6 +14,8 @@ import { javascript } from '@codemirror/lang-javascript';
 import { dracula } from '@uiw/codemirror-theme-dracula';
 import ErrorBoundary from '@/components/ErrorBoundary';
 
+const AUTOSAVE_INTERVAL_MS = 5000;
+
 const ContestAttempt = () => {
   const { contestId } = useParams();
   const { isAuthenticated } = useAuth();
@@ -35,6 +37,10 @@ const ContestAttempt = () => {
   const [showConfirmDialog, setShowConfirmDialog] = useState(false);
   const [showPopup, setShowPopup] = useState({ visible: false, message: '', autoClose: false });
   const historyRef = useRef(window.history.state);
+  const runAbortRef = useRef(null);
+  const savedAnswersRef = useRef({});
+  const answersRef = useRef({});
+  answersRef.current = answers;
 
   useEffect(() => {
     if (!isAuthenticated) {
@@ -60,6 +66,11 @@ const ContestAttempt = () => {
           initialAnswers[q.id] = q.type === 'msq' ? [] : q.type === 'coding' ? (q.initial_code || '') : '';
           initialScores[q.id] = 0;
         });
+        // Answers autosaved before a reload or crash take the place of the blanks.
+        Object.entries(response.data.saved_answers || {}).forEach(([id, answer]) => {
+          if (id in initialAnswers) initialAnswers[id] = answer;
+        });
+        savedAnswersRef.current = { ...initialAnswers };
         setAnswers(initialAnswers);
         setScores(initialScores);
       } catch (error) {
@@ -71,6 +82,27 @@ const ContestAttempt = () => {
     fetchContest();
   }, [contestId, isAuthenticated, navigate]);
 
+  // Periodically send the answers that changed since the last autosave.
+  useEffect(() => {
+    if (!testStarted) return undefined;
+    const autosaveId = setInterval(async () => {
+      const changed = {};
+      Object.entries(answersRef.current).forEach(([id, answer]) => {
+        if (JSON.stringify(answer) !== JSON.stringify(savedAnswersRef.current[id])) changed[id] = answer;
+      });
+      if (Object.keys(changed).length === 0) return;
+      try {
+        await axios.post(`/api/contests/student/attempt/${contestId}/autosave/`, { answers: changed }, {
+          headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` },
+        });
+        savedAnswersRef.current = { ...savedAnswersRef.current, ...changed };
+      } catch (error) {
+        console.error('Autosave failed:', error);
+      }
+    }, AUTOSAVE_INTERVAL_MS);
+    return () => clearInterval(autosaveId);
+  }, [testStarted, contestId]);
+
   useEffect(() => {
     if (testStarted && timeRemaining > 0) {
       const timerId = setInterval(() => {
@@ -204,26 +236,64 @@ const ContestAttempt = () => {
     }
   };
 
+  useEffect(() => () => runAbortRef.current?.abort(), []);
+
+  // Runs the code through the streaming endpoint, showing each test case as soon as it finishes.
+  const streamRunCode = async (questionId, testCases, timeLimit) => {
+    const controller = new AbortController();
+    runAbortRef.current = controller;
+    const response = await fetch(`/api/contests/code_execution/run/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Authorization: `Bearer ${localStorage.getItem('access_token')}`,
+      },
+      body: JSON.stringify({ code, language, question_id: questionId, test_cases: testCases, time_limit: timeLimit }),
+      signal: controller.signal,
+    });
+    if (!response.ok) {
+      const data = await response.json().catch(() => ({}));
+      throw new Error(data.error || 'Failed to run code.');
+    }
+
+    const results = new Array(testCases.length);
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const message = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        const event = message.match(/^event: (.*)$/m)?.[1];
+        const data = JSON.parse(message.match(/^data: (.*)$/m)?.[1] || '{}');
+        if (event === 'compile' && !data.ok) {
+          throw new Error('Compilation failed');
+        } else if (event === 'error') {
+          throw new Error(data.error);
+        } else if (event === 'result') {
+          results[data.index] = data;
+          setRunResults([...results]);
+        }
+      }
+    }
+    return results.filter(Boolean);
+  };
+
+  const handleCancelRun = () => {
+    runAbortRef.current?.abort();
+  };
+
   const handleRunCode = async () => {
     setIsRunningCode(true);
     setRunResults([]);
     try {
       const currentQ = contest.questions[currentQuestion];
-      const response = await axios.post(
-        `/api/contests/code_execution/run`,
-        {
-          code,
-          language,
-          test_cases: currentQ.visible_test_cases || [],
-          time_limit: currentQ.time_limit_seconds || 1,
-        },
-        {
-          headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` },
-        }
-      );
+      const results = await streamRunCode(currentQ.id, currentQ.visible_test_cases || [], currentQ.time_limit_seconds || 1);
 
-      const results = response.data.results || [];
-      setRunResults(results);
       setAnswers(prev => ({
         ...prev,
         [currentQ.id]: code,
@@ -236,9 +306,12 @@ const ContestAttempt = () => {
         autoClose: true,
       });
     } catch (error) {
-      console.error('Error running code:', error);
-      setError(error.response?.data?.error || 'Failed to run code.');
+      if (error.name !== 'AbortError') {
+        console.error('Error running code:', error);
+        setError(error.message || 'Failed to run code.');
+      }
     } finally {
+      runAbortRef.current = null;
       setIsRunningCode(false);
     }
   };
@@ -249,28 +322,15 @@ const ContestAttempt = () => {
     try {
       const currentQ = contest.questions[currentQuestion];
       const allTestCases = [...(currentQ.visible_test_cases || []), ...(currentQ.invisible_test_cases || [])];
-      const response = await axios.post(
-        `/api/contests/code_execution/run`,
-        {
-          code,
-          language,
-          test_cases: allTestCases,
-          time_limit: currentQ.time_limit_seconds || 1,
-        },
-        {
-          headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` },
-        }
-      );
+      const results = await streamRunCode(currentQ.id, allTestCases, currentQ.time_limit_seconds || 1);
 
-      const results = response.data.results || [];
-      setRunResults(results);
       setAnswers(prev => ({
         ...prev,
         [currentQ.id]: code,
       }));
       const passedCount = results.filter(r => r.passed).length;
       const errorCount = results.filter(r => r.error).length;
-      const totalScore = passedCount === results.length ? currentQ.score : 0;
+      const totalScore = passedCount === allTestCases.length ? currentQ.score : 0;
       setScores(prev => ({
         ...prev,
         [currentQ.id]: totalScore,
@@ -281,13 +341,30 @@ const ContestAttempt = () => {
         autoClose: true,
       });
     } catch (error) {
-      console.error('Error submitting coding question:', error);
-      setError(error.response?.data?.error || 'Failed to submit coding question.');
+      if (error.name !== 'AbortError') {
+        console.error('Error submitting coding question:', error);
+        setError(error.message || 'Failed to submit coding question.');
+      }
     } finally {
+      runAbortRef.current = null;
       setIsRunningCode(false);
     }
   };
 
+
+  const waitForGrading = async (jobId) => {
+    for (let i = 0; i < 120; i++) {
+      await new Promise(resolve => setTimeout(resolve, 2000));
+      const statusResponse = await axios.get(`/api/contests/grading/${jobId}/`, {
+        headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` },
+      });
+      if (['completed', 'failed'].includes(statusResponse.data.status)) {
+        return statusResponse.data;
+      }
+    }
+    return { test_case_results: [] };
+  };
+
   const handleSubmit = async (confirmed = false) => {
     if (isSubmitting) return;
     if (!confirmed) {
@@ -306,6 +383,7 @@ const ContestAttempt = () => {
           {
             code: answers[currentQ.id] || '',
             language,
+            question_id: currentQ.id,
             test_cases: allTestCases,
             time_limit: currentQ.time_limit_seconds || 1,
           },
@@ -334,10 +412,15 @@ const ContestAttempt = () => {
         }
       );
 
+      let graded = response.data;
+      if (graded.job_id && ['pending', 'running'].includes(graded.grading_status)) {
+        graded = await waitForGrading(graded.job_id);
+      }
+
       const newScores = {};
       let totalPassed = 0;
       let totalTestCases = 0;
-      response.data.test_case_results.forEach(result => {
+      (graded.test_case_results || []).forEach(result => {
         newScores[result.question_id] = result.score;
         if (result.type === 'coding' && result.test_results) {
           const passed = result.test_results.filter(tr => tr.passed).length;
@@ -349,7 +432,7 @@ const ContestAttempt = () => {
       setShowSuccess(true);
       const codingQuestions = contest.questions.filter(q => q.type === 'coding');
       if (codingQuestions.length > 0) {
-        const errorCount = response.data.test_case_results
+        const errorCount = (graded.test_case_results || [])
           .filter(r => r.type === 'coding' && r.test_results)
           .flatMap(r => r.test_results)
           .filter(tr => tr.error).length;
@@ -401,7 +484,7 @@ const ContestAttempt = () => {
       {results.length === 0 ? (
         <p className="text-gray-500">No results available. Run or submit the code to see results.</p>
       ) : (
-        results.map((result, idx) => (
+        results.map((result, idx) => result && (
           <div
             key={idx}
             className="bg-white p-4 rounded-lg shadow-sm border border-gray-200"
@@ -654,6 +737,11 @@ const ContestAttempt = () => {
                       >
                         Submit
                       </Button>
+                      {isRunningCode && (
+                        <Button onClick={handleCancelRun} variant="outline">
+                          Cancel
+                        </Button>
+                      )}
                     </div>
                     <TestCasePanel results={runResults} title="Test Case Results" />
                   </div>
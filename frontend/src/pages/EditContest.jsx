@@ -38,18 +38,18 @@ const EditContest = () => {
         const endDt = moment.tz(response.data.end_datetime, 'Asia/Kolkata').toDate();
         const questions = response.data.questions.map(q => ({
           id: q.id,
-          type: q.question_type,
+          type: q.type,
           description: q.description || '',
           options: Array.isArray(q.options) ? q.options : [],
-          answer: q.question_type === 'coding' ? null : JSON.stringify(q.answer || []),
+          answer: q.type === 'coding' ? null : JSON.stringify(q.answer || []),
           score: q.score || 1,
-          test_cases: q.question_type === 'coding' ? [
+          test_cases: q.type === 'coding' ? [
             ...(q.visible_test_cases || []).map(tc => ({ input: tc.input || '', output: tc.output || '', visible: true })),
             ...(q.invisible_test_cases || []).map(tc => ({ input: tc.input || '', output: tc.output || '', visible: false })),
           ] : [],
           input_files: [],
           output_files: [],
-          question_category: ['mcq', 'msq', 'blank'].includes(q.question_type) ? 'objective' : 'coding',
+          question_category: ['mcq', 'msq', 'blank'].includes(q.type) ? 'objective' : 'coding',
           time_limit_seconds: q.time_limit_seconds || 1,
         }));
         console.log('Fetched questions:', questions);
@@ -348,9 +348,10 @@ const EditContest = () => {
       start_datetime: moment(formData.start_datetime).tz('Asia/Kolkata').format('YYYY-MM-DDTHH:mm'),
       end_datetime: moment(formData.end_datetime).tz('Asia/Kolkata').format('YYYY-MM-DDTHH:mm'),
       duration_minutes: parseInt(formData.duration_minutes),
+      // Existing questions are sent back with their id; the ones left out are deleted
       questions: formData.questions
-        .filter(q => !q.id) // Send only new questions
         .map(q => ({
+          ...(q.id ? { id: q.id } : {}),
           type: q.type,
           description: q.description,
           options: q.options || null,
@@ -440,8 +441,17 @@ const EditContest = () => {
                   <li key={q.id || index} className="p-2 bg-gray-100 rounded">
                     <span>
                       Question {index + 1}: {q.description || 'Untitled'} ({q.question_category})
-                      {q.id && <span className="ml-2 text-gray-500">(Existing, cannot be modified)</span>}
+                      {q.id && <span className="ml-2 text-gray-500">(Existing)</span>}
                     </span>
+                    <Button
+                      type="button"
+                      variant="outline"
+                      size="sm"
+                      className="ml-2"
+                      onClick={() => setFormData({ ...formData, questions: formData.questions.filter((_, i) => i !== index) })}
+                    >
+                      Remove
+                    </Button>
                   </li>
                 ))}
               </ul>
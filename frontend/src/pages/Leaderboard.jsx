@@ -1,20 +1,39 @@
 import { useEffect, useState } from 'react';
 import { useParams } from 'react-router-dom';
 import { useAuth } from '@/contexts/AuthContext';
+import { Button } from '@/components/ui/button';
 import Navbar from '@/components/Navbar';
 import axios from 'axios';
 
+const PAGE_SIZE = 50;
+
+// Applies a live message to the ranking the socket sent before it.
+const applyLiveMessage = (ranking, message) => {
+  if (message.type === 'snapshot') return message.entries;
+  if (message.type !== 'delta' || !ranking) return ranking;
+  const byName = new Map(ranking.map((entry) => [entry.student_name, entry]));
+  message.removed.forEach((name) => byName.delete(name));
+  message.changed.forEach((entry) => byName.set(entry.student_name, entry));
+  return [...byName.values()].sort((a, b) => a.rank - b.rank);
+};
+
 const Leaderboard = () => {
   const { contestId } = useParams();
   const { isAuthenticated, user } = useAuth();
   const [leaderboard, setLeaderboard] = useState(null);
+  // The whole ranking, kept up to date by the socket once its first snapshot arrives.
+  const [liveRanking, setLiveRanking] = useState(null);
+  const [page, setPage] = useState(1);
+  const live = liveRanking !== null;
 
+  // Pages are fetched only until the live ranking takes over.
   useEffect(() => {
-    if (isAuthenticated && user?.role === 'admin') {
+    if (isAuthenticated && user?.role === 'admin' && !live) {
       const fetchLeaderboard = async () => {
         try {
           const response = await axios.get(`http://localhost:8000/api/contests/admin/contest/leaderboard/${contestId}/`, {
             headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` },
+            params: { page, page_size: PAGE_SIZE },
           });
           setLeaderboard(response.data);
         } catch (error) {
@@ -23,30 +42,78 @@ const Leaderboard = () => {
       };
       fetchLeaderboard();
     }
+  }, [isAuthenticated, user, contestId, page, live]);
+
+  useEffect(() => {
+    if (!isAuthenticated || user?.role !== 'admin') return undefined;
+    const token = encodeURIComponent(localStorage.getItem('access_token') || '');
+    const socket = new WebSocket(`ws://localhost:8000/ws/contests/${contestId}/leaderboard/?token=${token}`);
+    socket.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      setLiveRanking((ranking) => applyLiveMessage(ranking, message));
+    };
+    socket.onerror = () => console.error('Live leaderboard unavailable');
+    return () => socket.close();
   }, [isAuthenticated, user, contestId]);
 
+  const exportResults = async () => {
+    try {
+      const response = await axios.get(`http://localhost:8000/api/contests/admin/contest/${contestId}/results/export/`, {
+        headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` },
+        responseType: 'blob',
+      });
+      const link = document.createElement('a');
+      link.href = URL.createObjectURL(response.data);
+      link.download = `contest-${contestId}-results.csv`;
+      link.click();
+      URL.revokeObjectURL(link.href);
+    } catch (error) {
+      console.error('Failed to export results:', error);
+    }
+  };
+
   if (!isAuthenticated || user?.role !== 'admin') return <div>Unauthorized</div>;
   if (!leaderboard) return <div>Loading...</div>;
 
+  const entries = live
+    ? liveRanking.slice((page - 1) * PAGE_SIZE, page * PAGE_SIZE)
+    : leaderboard.leaderboard;
+  const participantCount = live ? liveRanking.length : leaderboard.contest.participant_count;
+  const totalPages = live ? Math.max(Math.ceil(liveRanking.length / PAGE_SIZE), 1) : leaderboard.total_pages;
+
   return (
     <div className="min-h-screen bg-gray-50">
       <Navbar />
       <div className="container mx-auto py-12 px-4">
         <h1 className="text-3xl font-bold mb-8">Leaderboard: {leaderboard.contest.name}</h1>
         <p>Max Score: {leaderboard.contest.max_score}</p>
-        <p>Participants: {leaderboard.contest.participant_count}</p>
+        <p>Participants: {participantCount}</p>
+        <Button variant="outline" className="mt-4" onClick={exportResults}>
+          Export CSV
+        </Button>
         <div className="mt-6 space-y-4">
-          {leaderboard.leaderboard.map((entry, index) => (
-            <div key={index} className="bg-white p-4 rounded-lg shadow-md">
-              <p className="font-semibold">{index + 1}. {entry.student_name}</p>
+          {entries.map((entry) => (
+            <div key={entry.rank} className="bg-white p-4 rounded-lg shadow-md">
+              <p className="font-semibold">{entry.rank}. {entry.student_name}</p>
               <p>Score: {entry.score}</p>
               <p>Submitted: {new Date(entry.submitted_at).toLocaleString()}</p>
             </div>
           ))}
         </div>
+        {totalPages > 1 && (
+          <div className="flex justify-center items-center gap-4 mt-8">
+            <Button variant="outline" disabled={page <= 1} onClick={() => setPage(page - 1)}>
+              Previous
+            </Button>
+            <span>Page {page} of {totalPages}</span>
+            <Button variant="outline" disabled={page >= totalPages} onClick={() => setPage(page + 1)}>
+              Next
+            </Button>
+          </div>
+        )}
       </div>
     </div>
   );
 };
 
-export default Leaderboard;
\ No newline at end of file
+export default Leaderboard;
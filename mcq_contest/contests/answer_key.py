@@ -0,0 +1,197 @@
+"""Grading of objective (mcq, msq and blank) answers against a compiled answer key.
+
+``AnswerKey`` normalizes a contest's answers once: mcq and blank answers
+become stripped strings, and each msq answer becomes a bitmask over the
+question's options, so checking an answer is one string or integer
+comparison. ``grade_batch`` works question by question over many
+submissions, choosing how to check each question once rather than once
+per answer; ``regrade_attempts`` (and the ``regrade_contest`` command) use
+it to rescore a contest's final attempts after its answer key is fixed.
+
+``submit_contest`` gets its key from ``answer_key_for``, which keeps it in
+the ``default`` cache next to the contest's ``updated_at``, the same way
+``question_cache`` keeps the student-facing questions.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Attempt, LeaderboardEntry
+
+logger = logging.getLogger(__name__)
+
+
+def unwrap(answer):
+    """A one-element list counts as its element for single-answer questions."""
+    return answer[0] if isinstance(answer, list) and len(answer) == 1 else answer
+
+
+class CompiledQuestion:
+    __slots__ = ('question_type', 'score', 'correct_answer', 'expected', 'option_bits')
+
+    def __init__(self, question):
+        self.question_type = question.question_type
+        self.score = question.score
+        self.correct_answer = question.answer
+        self.expected = None
+        self.option_bits = None
+        if self.question_type in ['mcq', 'blank']:
+            self.expected = str(unwrap(question.answer)).strip()
+        elif self.question_type == 'msq':
+            correct = question.answer if isinstance(question.answer, list) else [question.answer]
+            self.option_bits = {}
+            for choice in (question.options or []) + correct:
+                self.option_bits.setdefault(choice, 1 << len(self.option_bits))
+            self.expected = 0
+            for choice in correct:
+                self.expected |= self.option_bits[choice]
+
+
+def match_text(compiled, submitted_answer):
+    submitted_answer = unwrap(submitted_answer)
+    return str(submitted_answer).strip() == compiled.expected, submitted_answer
+
+
+def match_choices(compiled, submitted_answer):
+    if not isinstance(submitted_answer, list):
+        return False, submitted_answer
+    mask = 0
+    for choice in submitted_answer:
+        bit = compiled.option_bits.get(choice)
+        if bit is None:
+            return False, submitted_answer
+        mask |= bit
+    return mask == compiled.expected, submitted_answer
+
+
+MATCHERS = {
+    'mcq': match_text,
+    'blank': match_text,
+    'msq': match_choices,
+}
+
+
+def verdict(compiled, match, submitted_answer):
+    """Return ({'correct_answer', 'passed', 'score'[, 'error']}, normalized answer)."""
+    outcome = {'correct_answer': compiled.correct_answer, 'passed': False, 'score': 0}
+    try:
+        passed, submitted_answer = match(compiled, submitted_answer)
+    except Exception as e:
+        outcome['error'] = str(e)
+        return outcome, submitted_answer
+    if passed:
+        outcome['passed'] = True
+        outcome['score'] = compiled.score
+    return outcome, submitted_answer
+
+
+class AnswerKey:
+    """The answers of a set of questions, keyed by question id (as a string)."""
+
+    def __init__(self, questions):
+        self.questions = {str(question.id): CompiledQuestion(question) for question in questions}
+
+    @classmethod
+    def for_contest(cls, contest):
+        # contest_id is loaded too: the related manager reads it to attach ``contest`` to each question.
+        return cls(contest.questions.only('id', 'contest_id', 'question_type', 'options', 'answer', 'score'))
+
+    def __contains__(self, question_id):
+        return question_id in self.questions
+
+    def grade(self, question_id, submitted_answer):
+        """Return (result, normalized answer) for one answer.
+
+        ``result`` is the entry stored in ``Attempt.test_case_results``;
+        coding answers are marked pending and left to a ``GradingJob``.
+        """
+        compiled = self.questions[question_id]
+        result = {
+            'question_id': question_id,
+            'type': compiled.question_type,
+            'submitted_answer': submitted_answer,
+            'correct_answer': compiled.correct_answer,
+            'passed': False,
+            'score': 0,
+            'pending': compiled.question_type == 'coding',
+        }
+        if compiled.question_type in MATCHERS:
+            outcome, submitted_answer = verdict(compiled, MATCHERS[compiled.question_type], submitted_answer)
+            if 'error' in outcome:
+                logger.error(f"Error evaluating question {question_id}: {outcome['error']}")
+            result.update(outcome)
+        return result, submitted_answer
+
+    def grade_batch(self, submissions):
+        """Grade the objective answers of many ``{question_id: answer}`` dicts.
+
+        Returns one ``{question_id: outcome}`` dict per submission, where an
+        outcome holds the ``correct_answer``, ``passed``, ``score`` (and
+        ``error``) of a result entry.
+        """
+        graded = [{} for _ in submissions]
+        for question_id, compiled in self.questions.items():
+            match = MATCHERS.get(compiled.question_type)
+            if match is None:
+                continue
+            for answers, outcomes in zip(submissions, graded):
+                if question_id in answers:
+                    outcomes[question_id] = verdict(compiled, match, answers[question_id])[0]
+        return graded
+
+
+def cache_key(contest_id):
+    return f'answer_key:{contest_id}'
+
+
+def answer_key_for(contest):
+    """Return the compiled ``AnswerKey`` of ``contest``."""
+    cache = caches['default']
+    cached = cache.get(cache_key(contest.id))
+    if cached is not None and cached[0] == contest.updated_at:
+        return cached[1]
+    key = AnswerKey.for_contest(contest)
+    cache.set(cache_key(contest.id), (contest.updated_at, key), settings.QUESTION_CACHE_TIMEOUT)
+    return key
+
+
+def regrade_attempts(key, attempt_ids, save=True):
+    """Rescore the objective answers of the given final attempts; return how many changed.
+
+    Coding results are kept as they are. Attempts and their leaderboard
+    entries are written with ``bulk_update``, so no save signals are sent.
+    """
+    with transaction.atomic():
+        attempts = list(
+            Attempt.objects.with_details().select_for_update()
+            .filter(id__in=attempt_ids, is_final=True).only('id', 'score', 'answers', 'test_case_results')
+        )
+        graded = key.grade_batch([attempt.answers or {} for attempt in attempts])
+        changed = []
+        for attempt, outcomes in zip(attempts, graded):
+            results = []
+            for entry in attempt.test_case_results or []:
+                outcome = outcomes.get(entry['question_id'])
+                if outcome is not None:
+                    entry = {name: value for name, value in entry.items() if name != 'error'}
+                    entry.update(outcome)
+                results.append(entry)
+            score = sum(entry.get('score', 0) for entry in results)
+            if results != (attempt.test_case_results or []) or score != attempt.score:
+                attempt.test_case_results, attempt.score = results, score
+                changed.append(attempt)
+        if not save or not changed:
+            return len(changed)
+
+        Attempt.objects.bulk_update(changed, ['score', 'test_case_results'], batch_size=500)
+        scores = {attempt.id: attempt.score for attempt in changed}
+        entries = list(LeaderboardEntry.objects.filter(attempt_id__in=scores).only('id', 'attempt_id'))
+        now = timezone.now()
+        for entry in entries:
+            entry.score = scores[entry.attempt_id]
+            entry.updated_at = now
+        LeaderboardEntry.objects.bulk_update(entries, ['score', 'updated_at'], batch_size=500)
+    return len(changed)
@@ -0,0 +1,122 @@
+"""Buffered autosave of the answers in a student's draft attempt.
+
+Students autosave every few seconds, so ``autosave_attempt`` does not write
+each request to the database. The answers are merged into a per-process
+``AutosaveBuffer`` (the latest answer per question wins), which writes
+every buffered draft at once: every ``AUTOSAVE_FLUSH_SECONDS`` from a
+background thread, as soon as ``AUTOSAVE_MAX_PENDING`` drafts are waiting,
+and when the process exits. A flush locks the affected draft attempts,
+merges the buffered answers into what is stored (other processes may
+have saved other questions of the same draft) and writes them back with
+one ``bulk_update``.
+
+The draft a student may save to is looked up once and then kept in the
+``default`` cache next to the contest's ``updated_at`` (see ``draft_for``),
+so an autosave usually costs one primary-key lookup, and editing the
+contest's questions or times is seen by the next autosave.
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+from .models import Attempt, Contest
+
+logger = logging.getLogger(__name__)
+
+
+class AutosaveBuffer:
+    def __init__(self, flush_seconds, max_pending):
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.flusher = None
+
+    def add(self, attempt_id, answers):
+        """Buffer ``answers`` ({question_id: answer}) for the draft ``attempt_id``."""
+        with self.lock:
+            self.pending.setdefault(attempt_id, {}).update(answers)
+            full = len(self.pending) >= self.max_pending
+            if self.flusher is None:
+                self.flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+                self.flusher.start()
+        if full:
+            self.flush()
+
+    def buffered(self, attempt_id):
+        """Answers of ``attempt_id`` that have not been written yet."""
+        with self.lock:
+            return dict(self.pending.get(attempt_id, {}))
+
+    def flush(self):
+        """Write every buffered draft; return how many were updated."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+        try:
+            with transaction.atomic():
+                attempts = list(
+                    Attempt.objects.with_details().select_for_update()
+                    .filter(id__in=pending, is_final=False).only('id', 'answers')
+                )
+                for attempt in attempts:
+                    attempt.answers = {**(attempt.answers or {}), **pending[attempt.id]}
+                Attempt.objects.bulk_update(attempts, ['answers'])
+        except Exception:
+            logger.exception(f"Could not save {len(pending)} autosaved drafts, keeping them for the next flush")
+            with self.lock:
+                for attempt_id, answers in pending.items():
+                    self.pending[attempt_id] = {**answers, **self.pending.get(attempt_id, {})}
+            return 0
+        return len(attempts)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+            # This thread outlives requests; do not hold a connection between flushes.
+            connection.close()
+
+
+buffer = AutosaveBuffer(settings.AUTOSAVE_FLUSH_SECONDS, settings.AUTOSAVE_MAX_PENDING)
+atexit.register(buffer.flush)
+
+
+def draft_cache_key(contest_id, student_id):
+    return f'autosave_draft:{contest_id}:{student_id}'
+
+
+def draft_for(contest_id, student_id):
+    """Return ``{'attempt_id', 'deadline', 'question_ids'}`` for the student's draft, or None."""
+    updated_at = Contest.objects.filter(id=contest_id).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    cache = caches['default']
+    key = draft_cache_key(contest_id, student_id)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == updated_at:
+        return cached[1]
+    attempt = Attempt.objects.filter(
+        contest_id=contest_id, student_id=student_id, is_final=False
+    ).only('id', 'submitted_at').first()
+    contest = Contest.objects.filter(id=contest_id).only('end_datetime', 'duration_minutes').first()
+    if attempt is None or contest is None:
+        return None
+    draft = {
+        'attempt_id': attempt.id,
+        'deadline': min(attempt.submitted_at + timedelta(minutes=contest.duration_minutes), contest.end_datetime),
+        'question_ids': set(contest.questions.values_list('id', flat=True)),
+    }
+    cache.set(key, (updated_at, draft), settings.AUTOSAVE_DRAFT_CACHE_TIMEOUT)
+    return draft
+
+
+def forget_draft(contest_id, student_id):
+    caches['default'].delete(draft_cache_key(contest_id, student_id))
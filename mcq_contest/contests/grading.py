@@ -0,0 +1,191 @@
+"""Scoring of contest submissions.
+
+Objective questions are graded inline by ``submit_contest`` against the
+contest's compiled answer key (see ``contests.answer_key``). Coding
+questions are left pending on the saved attempt and graded afterwards by a
+``GradingJob`` (see the ``run_grader`` management command), so the submit
+request never waits for compilers or test runs. Verdicts for an unchanged
+answer are reused from the ``grading`` cache; the key includes a hash of
+the question's test cases, so editing them invalidates old verdicts. The
+judge is sent ``TestCase`` ids rather than the cases themselves and reads
+each one only when it is about to run.
+"""
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from .judge.client import run_job
+from .models import Attempt, GradingJob, Question
+
+logger = logging.getLogger(__name__)
+
+
+def evaluate_coding_question(code, language, test_cases, time_limit=1, fail_fast=False):
+    """Run code against stored test cases (``TestCase`` ids) and return one verdict per case.
+
+    A verdict names its case by ``test_case_id`` and keeps only the
+    ``passed``, ``error``, ``cpu_time`` and ``peak_rss_kb`` of the run, so
+    stored results stay small however large the cases and outputs are.
+    """
+    outcome = run_job({
+        'code': code,
+        'language': language,
+        'test_cases': test_cases,
+        'time_limit': time_limit,
+        'fail_fast': fail_fast
+    }, block=True)
+    if outcome['error'] or outcome['compile_error']:
+        error = outcome['error'] or f"Compilation failed: {outcome['compile_error']}"
+        return [{
+            'test_case_id': None,
+            'passed': False,
+            'error': error
+        }]
+    return [
+        {
+            'test_case_id': test_case_id,
+            'passed': result['passed'],
+            'error': result['error'],
+            'cpu_time': result['cpu_time'],
+            'peak_rss_kb': result['peak_rss_kb'],
+        }
+        for test_case_id, result in zip(test_cases, outcome['results'])
+    ]
+
+
+# Per-case errors that do not depend on judge load. Verdicts with any other
+# error (time limits, judge failures, compile errors, which the artifact
+# cache already makes cheap) are judged again next time.
+DETERMINISTIC_ERRORS = {None, 'Output limit exceeded', 'Skipped after an earlier failure'}
+
+
+def test_cases_version(question, content_hashes):
+    """Hash of everything about ``question`` (with test cases ``content_hashes``) that affects a coding verdict."""
+    payload = json.dumps([
+        content_hashes,
+        question.time_limit_seconds or 1,
+        settings.GRADING_FAIL_FAST,
+    ], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def grading_cache_key(question, content_hashes, code, language):
+    source_hash = hashlib.sha256(code.encode('utf-8')).hexdigest()
+    return f'grading:{question.id}:{test_cases_version(question, content_hashes)}:{language}:{source_hash}'
+
+
+def grade_coding(question, code, language):
+    """Return the submission result entry for one coding question."""
+    result = {'passed': False, 'score': 0, 'pending': False}
+    stored = list(question.test_cases.values_list('id', 'content_hash'))
+    all_test_cases = [test_case_id for test_case_id, _ in stored]
+    if not all_test_cases:
+        result['error'] = 'No test cases available'
+        return result
+    code = code or ''
+    cache = caches['grading']
+    cache_key = grading_cache_key(question, [content_hash for _, content_hash in stored], code, language)
+    test_results = cache.get(cache_key)
+    if test_results is None:
+        try:
+            test_results = evaluate_coding_question(
+                code=code,
+                language=language,
+                test_cases=all_test_cases,
+                time_limit=question.time_limit_seconds or 1,
+                fail_fast=settings.GRADING_FAIL_FAST
+            )
+        except Exception as e:
+            logger.error(f"Error evaluating question {question.id}: {str(e)}")
+            result['error'] = str(e)
+            return result
+        complete = len(test_results) == len(all_test_cases)
+        if complete and all(tr['error'] in DETERMINISTIC_ERRORS for tr in test_results):
+            cache.set(cache_key, test_results)
+    else:
+        logger.info(f"Reusing cached verdicts for question {question.id}")
+    result['test_results'] = test_results
+    if len(test_results) != len(all_test_cases):
+        # A compile or judge error leaves a single entry; anything else short is a partial run.
+        if not any(tr['error'] for tr in test_results):
+            result['error'] = f'The judge returned {len(test_results)} of {len(all_test_cases)} results'
+        return result
+    if all(tr['passed'] for tr in test_results):
+        result['passed'] = True
+        result['score'] = question.score
+    return result
+
+
+def run_grading_job(job):
+    """Grade every pending coding question of ``job.attempt``, saving after each one."""
+    attempt = job.attempt
+    pending = [r['question_id'] for r in attempt.test_case_results or [] if r.get('pending')]
+    questions = Question.objects.in_bulk([int(qid) for qid in pending])
+
+    for question_id in pending:
+        question = questions.get(int(question_id))
+        if question is None:
+            result = {'passed': False, 'score': 0, 'pending': False, 'error': 'Question no longer exists'}
+        else:
+            result = grade_coding(question, attempt.answers.get(question_id), job.language)
+
+        with transaction.atomic():
+            attempt = Attempt.objects.with_details().select_for_update().filter(pk=attempt.pk).first()
+            if attempt is None:
+                logger.info(f"Attempt for grading job {job.id} was replaced, stopping")
+                return
+            entry = next((
+                entry for entry in attempt.test_case_results
+                if entry['question_id'] == question_id and entry.get('pending')
+            ), None)
+            if entry is None:
+                # Another grader reclaimed this job as stale and already scored the question.
+                logger.info(f"Question {question_id} of grading job {job.id} was already graded, skipping")
+                continue
+            entry.update(result)
+            attempt.score += result['score']
+            attempt.save(update_fields=['score', 'test_case_results'])
+            GradingJob.objects.filter(pk=job.pk).update(
+                graded_questions=job.graded_questions + 1,
+                updated_at=timezone.now()
+            )
+            job.graded_questions += 1
+
+    GradingJob.objects.filter(pk=job.pk).update(status='completed', finished_at=timezone.now())
+    job.status = 'completed'
+
+
+def claim_next_job():
+    """Mark the oldest pending (or abandoned running) job as running and return it."""
+    stale_before = timezone.now() - timedelta(seconds=settings.GRADING_JOB_STALE_SECONDS)
+    with transaction.atomic():
+        job = (
+            GradingJob.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .first()
+        ) or (
+            GradingJob.objects.select_for_update(skip_locked=True)
+            .filter(status='running', updated_at__lt=stale_before)
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.save(update_fields=['status', 'updated_at'])
+    return GradingJob.objects.select_related('attempt').get(pk=job.pk)
+
+
+def process_job(job):
+    try:
+        run_grading_job(job)
+    except Exception as e:
+        logger.exception(f"Grading job {job.id} failed")
+        GradingJob.objects.filter(pk=job.pk).update(
+            status='failed', error=str(e), finished_at=timezone.now()
+        )
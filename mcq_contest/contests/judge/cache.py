@@ -0,0 +1,201 @@
+"""Content-addressed cache of compiled submissions.
+
+Entries live in ``<root>/<key[:2]>/<key>/`` where the key is the sha256 of
+the language, the compile command (i.e. the compiler flags) and the source.
+An entry holds whatever the compiler produced (``a.out`` or ``.class``
+files), or ``compile_error.txt`` when compilation failed. Entries are
+published with an atomic rename so concurrent workers never see a partial
+build.
+
+Each process keeps a running total of the cache's size: it scans the cache
+once, then adds the size of every entry it publishes. Only when that total
+passes ``max_bytes`` does it scan again and evict the least recently used
+entries, down to ``EVICT_TO`` of ``max_bytes``. A job holds a shared
+``flock`` on the entry it uses (see ``ArtifactCache.use``) and eviction
+skips entries that are locked, so a running job's binary or class
+directory is never removed under it.
+"""
+import contextlib
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from .languages import COMPILE_TIMEOUT_SECONDS, render_command
+
+logger = logging.getLogger(__name__)
+
+ERROR_FILE = 'compile_error.txt'
+
+# Eviction stops once the cache is this fraction of ``max_bytes``, so the
+# next scan is a good many compilations away.
+EVICT_TO = 0.9
+
+
+class CompilerUnavailable(Exception):
+    """Compilation did not produce a result worth caching (timeout, missing compiler)."""
+
+
+def artifact_key(language, compile_command, source):
+    digest = hashlib.sha256()
+    digest.update(language.encode('utf-8') + b'\0')
+    digest.update(json.dumps(compile_command).encode('utf-8') + b'\0')
+    digest.update(hashlib.sha256(source.encode('utf-8')).digest())
+    return digest.hexdigest()
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+class ArtifactCache:
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # Bytes in the cache as of the last scan plus what this process published since; None before the first scan.
+        self.total = None
+
+    def _entry_path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    @contextlib.contextmanager
+    def use(self, language, spec, source):
+        """Yield ``(artifact_dir, compile_error)`` for ``source``, compiling on a miss.
+
+        The entry is locked against eviction until the block exits.
+        """
+        entry = self._entry_path(artifact_key(language, spec['compile'], source))
+        while True:
+            fd = self._lock_entry(entry)
+            if fd is not None:
+                break
+            self._compile(entry, spec, source)
+        try:
+            yield entry, self._read_error(entry)
+        finally:
+            os.close(fd)
+
+    def _lock_entry(self, entry):
+        """Return a descriptor holding a shared lock on ``entry``, or None if it is not in the cache."""
+        try:
+            fd = os.open(entry, os.O_RDONLY | os.O_DIRECTORY)
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            # Eviction may have renamed the directory away before the lock was granted.
+            if not os.path.samestat(os.fstat(fd), os.stat(entry)):
+                raise FileNotFoundError(entry)
+            os.utime(entry)
+        except FileNotFoundError:
+            os.close(fd)
+            return None
+        return fd
+
+    def _compile(self, entry, spec, source):
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='build-', dir=self.root)
+        try:
+            with open(os.path.join(staging, spec['source']), 'w') as f:
+                f.write(source)
+            try:
+                result = subprocess.run(
+                    render_command(spec['compile'], source=spec['source'], binary='a.out', workdir='.'),
+                    cwd=staging,
+                    capture_output=True,
+                    text=True,
+                    timeout=COMPILE_TIMEOUT_SECONDS
+                )
+            except subprocess.TimeoutExpired:
+                raise CompilerUnavailable('Compilation timed out')
+            except OSError as e:
+                raise CompilerUnavailable(f'Compiler could not be started: {e}')
+            os.remove(os.path.join(staging, spec['source']))
+            if result.returncode != 0:
+                with open(os.path.join(staging, ERROR_FILE), 'w') as f:
+                    f.write(result.stderr)
+            size = _dir_size(staging)
+            try:
+                os.rename(staging, entry)
+            except OSError:
+                # Another worker published the same artifact first; use theirs.
+                shutil.rmtree(staging, ignore_errors=True)
+                size = 0
+            staging = None
+        finally:
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+        self._published(size)
+
+    def _published(self, size):
+        with self.lock:
+            if self.total is not None:
+                self.total += size
+                if self.total <= self.max_bytes:
+                    return
+        self.evict()
+
+    def _read_error(self, entry):
+        try:
+            with open(os.path.join(entry, ERROR_FILE)) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def evict(self):
+        """Remove least recently used entries that no job is using once the cache outgrows ``max_bytes``."""
+        with self.lock:
+            entries = []
+            total = 0
+            for shard in os.scandir(self.root):
+                if not shard.is_dir() or shard.name.startswith('build-'):
+                    continue
+                for entry in os.scandir(shard.path):
+                    try:
+                        size = _dir_size(entry.path)
+                        entries.append((entry.stat().st_mtime, size, entry.path))
+                    except FileNotFoundError:
+                        continue
+                    total += size
+            if total > self.max_bytes:
+                entries.sort()
+                for _, size, path in entries:
+                    if total <= self.max_bytes * EVICT_TO:
+                        break
+                    if self._remove_unused(path):
+                        total -= size
+                        logger.debug(f'Evicted compiled artifact {path}')
+            self.total = total
+
+    def _remove_unused(self, path):
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        except FileNotFoundError:
+            return False
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            trash = f'{path}.evicted-{os.getpid()}'
+            try:
+                os.rename(path, trash)
+            except OSError:
+                return False
+        finally:
+            os.close(fd)
+        shutil.rmtree(trash, ignore_errors=True)
+        return True
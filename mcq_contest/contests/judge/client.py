@@ -0,0 +1,72 @@
+"""Django-side client for the judge worker pool (see ``judge.server``)."""
+import socket
+
+from django.conf import settings
+
+from .executor import execute, collect
+from .protocol import send_message, recv_message
+
+
+class JudgeError(Exception):
+    pass
+
+
+class JudgeUnavailable(JudgeError):
+    """The judge server is not running or dropped the connection."""
+
+
+class JudgeBusy(JudgeError):
+    """Every worker for the language is busy and the queue is full."""
+
+
+class JudgeSuperseded(JudgeError):
+    """A newer request from the same owner replaced this one."""
+
+
+def stream_job(job, block=False, owner=None):
+    """Send ``job`` to the judge and yield its events as they arrive.
+
+    With ``block`` the job waits for a free worker instead of being rejected
+    with ``JudgeBusy`` when the language pool is full. A later job with the
+    same ``owner`` cancels this one, which then raises ``JudgeSuperseded``.
+    In-process execution (``JUDGE_INPROCESS``) neither shares nor supersedes
+    jobs.
+    """
+    if settings.JUDGE_INPROCESS:
+        yield from execute(job)
+        return
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(settings.JUDGE_CONNECT_TIMEOUT)
+    try:
+        try:
+            sock.connect(settings.JUDGE_SOCKET_PATH)
+            send_message(sock, {'type': 'job', 'job': job, 'block': block, 'owner': owner})
+        except OSError as e:
+            raise JudgeUnavailable(f'Judge is unavailable: {e}')
+
+        # A blocking job may sit in the queue for a while; only time out once it runs.
+        sock.settimeout(None if block else settings.JUDGE_RESPONSE_TIMEOUT)
+        while True:
+            try:
+                event = recv_message(sock)
+            except OSError as e:
+                raise JudgeUnavailable(f'Judge did not respond: {e}')
+            if event is None:
+                raise JudgeUnavailable('Judge closed the connection')
+            if event['event'] == 'busy':
+                raise JudgeBusy('All judge workers are busy, please retry shortly')
+            if event['event'] == 'superseded':
+                raise JudgeSuperseded('Cancelled by a newer run')
+            if event['event'] == 'started':
+                sock.settimeout(settings.JUDGE_RESPONSE_TIMEOUT)
+            yield event
+            if event['event'] == 'done':
+                return
+    finally:
+        sock.close()
+
+
+def run_job(job, block=False, owner=None):
+    """Run ``job`` to completion; see ``executor.collect`` for the result shape."""
+    return collect(stream_job(job, block=block, owner=owner))
@@ -0,0 +1,299 @@
+"""Compile a submission and run it against test cases.
+
+``execute`` is a generator of events so that the judge server can relay
+progress to clients while a job is still running:
+
+    {'event': 'compile', 'ok': bool, 'error': str | None}
+    {'event': 'result', 'index': int, 'result': {...}}
+    {'event': 'error', 'error': str}
+    {'event': 'done'}
+"""
+import contextlib
+import logging
+import os
+import queue
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+from .cache import ArtifactCache, CompilerUnavailable
+from .languages import LANGUAGES, render_command
+from .sandbox import limits_for
+from .sessions import (
+    ProcessSession, HarnessSession, python_harness_command,
+    JAVA_RUNNER_SPEC, java_runner_source, java_runner_command,
+)
+from .workspace import WorkspacePool
+
+logger = logging.getLogger(__name__)
+
+CANCEL_POLL_SECONDS = 0.05
+
+_artifact_cache = None
+_workspace_pool = None
+
+
+def get_artifact_cache():
+    global _artifact_cache
+    if _artifact_cache is None:
+        _artifact_cache = ArtifactCache(settings.JUDGE_CACHE_DIR, settings.JUDGE_CACHE_MAX_BYTES)
+    return _artifact_cache
+
+
+def get_workspace_pool():
+    global _workspace_pool
+    # Judge workers are forked; each process needs workspaces of its own.
+    if _workspace_pool is None or _workspace_pool.pid != os.getpid():
+        _workspace_pool = WorkspacePool(settings.JUDGE_WORKSPACE_ROOT, settings.JUDGE_WORKSPACES)
+    return _workspace_pool
+
+
+def case_result(output=None, passed=False, error=None, stderr=None, cpu_time=None, peak_rss_kb=None):
+    """A case's verdict; it never repeats the case itself, which may be large."""
+    return {
+        'output': output,
+        'passed': passed,
+        'error': error,
+        'stderr': stderr,
+        'cpu_time': cpu_time,
+        'peak_rss_kb': peak_rss_kb,
+    }
+
+
+def load_test_case(test_case):
+    """Return ``{'input', 'output'}`` for an inline case or a stored ``TestCase`` id."""
+    if not isinstance(test_case, int):
+        return test_case
+    from ..models import TestCase
+    stored = TestCase.objects.filter(pk=test_case).only('input', 'output').first()
+    if stored is None:
+        return None
+    return {'input': stored.input, 'output': stored.output}
+
+
+def result_from_raw(test_case, raw):
+    usage = {'cpu_time': raw['cpu_time'], 'peak_rss_kb': raw['peak_rss_kb']}
+    if raw['timed_out']:
+        return case_result(error='Time limit exceeded', **usage)
+    if raw['error']:
+        return case_result(error=raw['error'], **usage)
+    output = raw['stdout'].strip()
+    if raw['output_truncated']:
+        # Overflowing output also kills the process, so this comes before its exit code.
+        error = 'Output limit exceeded'
+    elif raw['exit_code']:
+        error = f"Runtime error (exit code {raw['exit_code']})"
+    else:
+        error = None
+    return case_result(
+        output=output,
+        passed=error is None and output == (test_case.get('output') or '').strip(),
+        error=error,
+        stderr=raw['stderr'].strip() or None,
+        **usage
+    )
+
+
+def open_session(language, spec, paths, cwd):
+    limits = limits_for(language)
+    if spec.get('harness') == 'python' and settings.JUDGE_PYTHON_HARNESS:
+        return HarnessSession(python_harness_command(spec['run'][0], paths['source']), cwd=cwd, limits=limits)
+    if paths.get('runner'):
+        return HarnessSession(java_runner_command(paths['runner'], paths['workdir']), cwd=cwd, limits=limits)
+    return ProcessSession(render_command(spec['run'], **paths), cwd=cwd, limits=limits)
+
+
+def use_java_runner(artifacts):
+    """Return the directory of the compiled Java runner, held until ``artifacts`` closes, or None."""
+    try:
+        runner_dir, error = artifacts.enter_context(
+            get_artifact_cache().use('java-runner', JAVA_RUNNER_SPEC, java_runner_source())
+        )
+    except CompilerUnavailable as e:
+        error = str(e)
+    if error is None:
+        return runner_dir
+    logger.error(f'Could not build the Java runner, starting a JVM per case: {error}')
+    return None
+
+
+def run_cases(open_case_session, test_cases, time_limit, parallelism=1, fail_fast=False, cancel=None):
+    """Run ``test_cases`` on up to ``parallelism`` sessions and yield ``(index, result)``.
+
+    A case is either ``{'input', 'output'}`` or the id of a stored
+    ``TestCase``, which is loaded just before it runs, so a job never holds
+    more than one case per session in memory. Results are yielded as cases finish, so indices may arrive out of order.
+    With ``fail_fast`` the first failing case stops the rest, which are
+    reported as skipped; setting ``cancel`` kills the cases that are running
+    and stops the rest, all without a result. Otherwise every case gets a
+    result: a session that cannot start or a case that raises is reported
+    as a ``Judge error``.
+    """
+    parallelism = max(1, min(parallelism, len(test_cases)))
+    lock = threading.Lock()
+    pending = iter(enumerate(test_cases))
+    finished = queue.Queue()
+    stop = threading.Event()
+    sessions = []
+
+    def run_shard():
+        session = session_error = None
+        try:
+            session = open_case_session()
+            with lock:
+                sessions.append(session)
+        except Exception as e:
+            logger.exception('Could not start a judge session')
+            session_error = f'Judge error: {e}'
+        try:
+            while True:
+                with lock:
+                    index, test_case = next(pending, (None, None))
+                if index is None:
+                    return
+                if cancel is not None and cancel.is_set():
+                    continue
+                if stop.is_set():
+                    finished.put((index, case_result(error='Skipped after an earlier failure')))
+                    continue
+                if session_error is not None:
+                    finished.put((index, case_result(error=session_error)))
+                    continue
+                try:
+                    test_case = load_test_case(test_case)
+                    if test_case is None:
+                        finished.put((index, case_result(error='Test case no longer exists')))
+                        continue
+                    result = result_from_raw(test_case, session.run_case(test_case.get('input', ''), time_limit))
+                except Exception as e:
+                    # Every case gets a result, so a grader never scores a partial run.
+                    logger.exception(f'Test case {index} could not be run')
+                    result = case_result(error=f'Judge error: {e}')
+                if cancel is not None and cancel.is_set():
+                    continue
+                if fail_fast and not result['passed']:
+                    stop.set()
+                finished.put((index, result))
+        finally:
+            if session is not None:
+                session.close()
+            # Stored cases were read on this thread's own database connection.
+            connection.close()
+            finished.put(None)
+
+    def watch_cancel():
+        while not stop.is_set():
+            if cancel.wait(CANCEL_POLL_SECONDS):
+                with lock:
+                    for session in sessions:
+                        session.kill()
+                return
+
+    threads = [threading.Thread(target=run_shard, daemon=True) for _ in range(parallelism)]
+    for thread in threads:
+        thread.start()
+    if cancel is not None:
+        threading.Thread(target=watch_cancel, daemon=True).start()
+    try:
+        running = len(threads)
+        while running:
+            item = finished.get()
+            if item is None:
+                running -= 1
+            else:
+                yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def execute(job, cancel=None):
+    """Run ``job`` ({'code', 'language', 'test_cases', 'time_limit'}) and yield events.
+
+    ``test_cases`` may mix inline ``{'input', 'output'}`` dicts and
+    ``TestCase`` ids (see ``run_cases``).
+
+    Optional job keys: ``parallelism`` (cases run at once, defaults to
+    JUDGE_CASE_PARALLELISM) and ``fail_fast`` (skip the remaining cases after
+    the first failure).
+    """
+    language = job.get('language')
+    test_cases = job.get('test_cases') or []
+    time_limit = job.get('time_limit') or 1
+
+    spec = LANGUAGES.get(language)
+    if spec is None:
+        yield {'event': 'error', 'error': f'Unsupported language: {language}'}
+        yield {'event': 'done'}
+        return
+
+    # Compiled artifacts stay locked against eviction until the job is done
+    # with them; shard workspaces are handed back once every shard has closed.
+    with get_workspace_pool().workspace() as workdir, contextlib.ExitStack() as artifacts, \
+            contextlib.ExitStack() as shard_workspaces:
+        paths = {
+            'source': os.path.join(workdir, spec['source']),
+            'binary': os.path.join(workdir, 'a.out'),
+            'workdir': workdir,
+        }
+        if spec['compile']:
+            try:
+                artifact_dir, compile_error = artifacts.enter_context(
+                    get_artifact_cache().use(language, spec, job.get('code') or '')
+                )
+            except CompilerUnavailable as e:
+                yield {'event': 'compile', 'ok': False, 'error': str(e)}
+                yield {'event': 'done'}
+                return
+            if compile_error is not None:
+                yield {'event': 'compile', 'ok': False, 'error': compile_error}
+                yield {'event': 'done'}
+                return
+            paths['binary'] = os.path.join(artifact_dir, 'a.out')
+            paths['workdir'] = artifact_dir
+            if spec.get('harness') == 'java' and settings.JUDGE_JAVA_RUNNER:
+                paths['runner'] = use_java_runner(artifacts)
+        else:
+            with open(paths['source'], 'w') as f:
+                f.write(job.get('code') or '')
+        yield {'event': 'compile', 'ok': True, 'error': None}
+
+        workspace_lock = threading.Lock()
+
+        def open_shard_session():
+            # Each shard runs in a scratch directory of its own, so cases
+            # running at the same time never see each other's files.
+            with workspace_lock:
+                cwd = shard_workspaces.enter_context(get_workspace_pool().workspace())
+            return open_session(language, spec, paths, cwd)
+
+        parallelism = job.get('parallelism') or settings.JUDGE_CASE_PARALLELISM
+        for index, result in run_cases(
+            open_shard_session,
+            test_cases,
+            time_limit,
+            parallelism=parallelism,
+            fail_fast=job.get('fail_fast', False),
+            cancel=cancel
+        ):
+            yield {'event': 'result', 'index': index, 'result': result}
+
+        yield {'event': 'done'}
+
+
+def collect(events):
+    """Drain an event stream into {'error', 'compile_error', 'results'}."""
+    outcome = {'error': None, 'compile_error': None, 'results': []}
+    results = {}
+    for event in events:
+        kind = event.get('event')
+        if kind == 'error':
+            outcome['error'] = event['error']
+        elif kind == 'compile' and not event['ok']:
+            outcome['compile_error'] = event['error']
+        elif kind == 'result':
+            results[event['index']] = event['result']
+    outcome['results'] = [results[i] for i in sorted(results)]
+    return outcome
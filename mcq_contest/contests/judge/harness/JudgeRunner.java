@@ -0,0 +1,244 @@
+import java.io.BufferedReader;
+import java.io.ByteArrayInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.File;
+import java.io.FileInputStream;
+import java.io.FileOutputStream;
+import java.io.InputStream;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.management.ManagementFactory;
+import java.lang.management.ThreadMXBean;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+
+/**
+ * Warm Java runner: execute a compiled Solution against many inputs in one JVM.
+ *
+ * Started by judge.sessions.HarnessSession as
+ * {@code java -cp <runner dir> JudgeRunner <class dir> <command fd> <response fd>}.
+ * It answers {"ready":true} once booted, then reads one JSON request
+ * {"output_limit": n, "input": "..."} per line and replies with
+ * {"stdout","stderr","exit_code","output_truncated","cpu_time","peak_rss_kb"}.
+ * Every case loads Solution through a fresh class loader, so static state
+ * never leaks between cases, and gets its own System.in/out/err. If the
+ * submission calls System.exit, a shutdown hook still reports the captured
+ * output (flagged "exited", with a null "exit_code") before the JVM goes
+ * away; the status the submission exited with is the runner's own, which
+ * the session reads when it reaps the process.
+ */
+public class JudgeRunner {
+    private static final Object LOCK = new Object();
+    private static final ThreadMXBean THREADS = ManagementFactory.getThreadMXBean();
+    private static PrintStream responses;
+    private static LimitedOutputStream caseOut;
+    private static LimitedOutputStream caseErr;
+    private static long caseCpuStart;
+    private static boolean inCase = false;
+
+    /** Thrown into the submission once it has written more than it may. */
+    static class OutputLimitError extends Error {
+        OutputLimitError() {
+            super("Output limit exceeded");
+        }
+    }
+
+    static class LimitedOutputStream extends ByteArrayOutputStream {
+        private final long limit;
+        boolean truncated = false;
+
+        LimitedOutputStream(long limit) {
+            this.limit = limit;
+        }
+
+        @Override
+        public synchronized void write(int b) {
+            write(new byte[] { (byte) b }, 0, 1);
+        }
+
+        @Override
+        public synchronized void write(byte[] b, int off, int len) {
+            if (limit >= 0 && count + len > limit) {
+                super.write(b, off, (int) Math.max(0, limit - count));
+                truncated = true;
+                throw new OutputLimitError();
+            }
+            super.write(b, off, len);
+        }
+    }
+
+    public static void main(String[] args) throws Exception {
+        URL[] classPath = { new File(args[0]).toURI().toURL() };
+        BufferedReader commands = new BufferedReader(new InputStreamReader(
+                new FileInputStream("/dev/fd/" + args[1]), StandardCharsets.UTF_8));
+        responses = new PrintStream(new FileOutputStream("/dev/fd/" + args[2]), true, "UTF-8");
+
+        final InputStream realIn = System.in;
+        final PrintStream realOut = System.out;
+        final PrintStream realErr = System.err;
+        Runtime.getRuntime().addShutdownHook(new Thread(() -> {
+            synchronized (LOCK) {
+                if (inCase) {
+                    flushQuietly();
+                    respond(null, true);
+                }
+            }
+        }));
+
+        responses.println("{\"ready\":true}");
+        String line;
+        while ((line = commands.readLine()) != null) {
+            long outputLimit = parseOutputLimit(line);
+            String input = parseInput(line);
+            synchronized (LOCK) {
+                caseOut = new LimitedOutputStream(outputLimit);
+                caseErr = new LimitedOutputStream(outputLimit);
+                inCase = true;
+            }
+            resetPeakRss();
+            caseCpuStart = THREADS.getCurrentThreadCpuTime();
+            System.setIn(new ByteArrayInputStream(input.getBytes(StandardCharsets.UTF_8)));
+            System.setOut(new PrintStream(caseOut, false, "UTF-8"));
+            System.setErr(new PrintStream(caseErr, true, "UTF-8"));
+
+            int exitCode = 0;
+            try (URLClassLoader loader = new URLClassLoader(classPath, ClassLoader.getPlatformClassLoader())) {
+                Class<?> solution = Class.forName("Solution", true, loader);
+                Method main = solution.getMethod("main", String[].class);
+                main.invoke(null, (Object) new String[0]);
+            } catch (InvocationTargetException e) {
+                exitCode = 1;
+                if (!(e.getCause() instanceof OutputLimitError)) {
+                    printQuietly(e.getCause());
+                }
+            } catch (Throwable t) {
+                exitCode = 1;
+                printQuietly(t);
+            } finally {
+                flushQuietly();
+                System.setIn(realIn);
+                System.setOut(realOut);
+                System.setErr(realErr);
+            }
+            synchronized (LOCK) {
+                respond(exitCode, false);
+                inCase = false;
+            }
+        }
+    }
+
+    private static void printQuietly(Throwable t) {
+        try {
+            t.printStackTrace();
+        } catch (OutputLimitError e) {
+            // stderr is already full
+        }
+    }
+
+    private static void flushQuietly() {
+        try {
+            System.out.flush();
+            System.err.flush();
+        } catch (OutputLimitError e) {
+            // the captured output stops at the limit
+        }
+    }
+
+    private static void resetPeakRss() {
+        try (FileOutputStream clearRefs = new FileOutputStream("/proc/self/clear_refs")) {
+            clearRefs.write('5');
+        } catch (Exception e) {
+            // not supported here; peak_rss_kb then covers the runner's lifetime
+        }
+    }
+
+    private static long peakRssKb() {
+        try (BufferedReader status = new BufferedReader(new InputStreamReader(
+                new FileInputStream("/proc/self/status"), StandardCharsets.UTF_8))) {
+            String line;
+            while ((line = status.readLine()) != null) {
+                if (line.startsWith("VmHWM:")) {
+                    return Long.parseLong(line.replaceAll("[^0-9]", ""));
+                }
+            }
+        } catch (Exception e) {
+            // fall through
+        }
+        return 0;
+    }
+
+    private static void respond(Integer exitCode, boolean exited) {
+        String stdout = new String(caseOut.toByteArray(), StandardCharsets.UTF_8);
+        String stderr = new String(caseErr.toByteArray(), StandardCharsets.UTF_8);
+        double cpuTime = (THREADS.getCurrentThreadCpuTime() - caseCpuStart) / 1e9;
+        responses.println("{\"stdout\":" + quote(stdout)
+                + ",\"stderr\":" + quote(stderr)
+                + ",\"exit_code\":" + exitCode
+                + ",\"output_truncated\":" + (caseOut.truncated || caseErr.truncated)
+                + ",\"cpu_time\":" + String.format(java.util.Locale.ROOT, "%.3f", Math.max(0, cpuTime))
+                + ",\"peak_rss_kb\":" + peakRssKb()
+                + ",\"exited\":" + exited + "}");
+        responses.flush();
+    }
+
+    /** Read "output_limit" (null or a number) from a request; -1 means unlimited. */
+    private static long parseOutputLimit(String line) {
+        int i = line.indexOf("\"output_limit\":");
+        if (i < 0) {
+            return -1;
+        }
+        i += "\"output_limit\":".length();
+        int end = line.indexOf(',', i);
+        String value = line.substring(i, end < 0 ? line.length() : end).trim();
+        return value.startsWith("null") ? -1 : Long.parseLong(value);
+    }
+
+    /** Extract the "input" string from a request written by Python's json.dumps. */
+    private static String parseInput(String line) {
+        int i = line.indexOf("\"input\":") + "\"input\":".length();
+        i = line.indexOf('"', i) + 1;
+        StringBuilder sb = new StringBuilder();
+        while (i < line.length()) {
+            char c = line.charAt(i++);
+            if (c == '"') {
+                break;
+            }
+            if (c != '\\') {
+                sb.append(c);
+                continue;
+            }
+            char e = line.charAt(i++);
+            switch (e) {
+                case 'n': sb.append('\n'); break;
+                case 'r': sb.append('\r'); break;
+                case 't': sb.append('\t'); break;
+                case 'b': sb.append('\b'); break;
+                case 'f': sb.append('\f'); break;
+                case 'u':
+                    sb.append((char) Integer.parseInt(line.substring(i, i + 4), 16));
+                    i += 4;
+                    break;
+                default: sb.append(e);
+            }
+        }
+        return sb.toString();
+    }
+
+    private static String quote(String s) {
+        StringBuilder sb = new StringBuilder(s.length() + 2).append('"');
+        for (int i = 0; i < s.length(); i++) {
+            char c = s.charAt(i);
+            if (c == '"' || c == '\\') {
+                sb.append('\\').append(c);
+            } else if (c < 0x20) {
+                sb.append(String.format("\\u%04x", (int) c));
+            } else {
+                sb.append(c);
+            }
+        }
+        return sb.append('"').toString();
+    }
+}
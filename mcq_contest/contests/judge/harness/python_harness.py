@@ -0,0 +1,208 @@
+"""Warm Python runner: execute one submission against many inputs in a single process.
+
+Started by ``judge.sessions.HarnessSession`` as
+``python python_harness.py <source> <command fd> <response fd>``. It compiles
+the source once, reports ``{"ready": true}`` and then answers each
+newline-delimited JSON request ``{"output_limit": int | null, "input": str}``
+with ``{"stdout", "stderr", "exit_code", "output_truncated", "cpu_time",
+"peak_rss_kb"}``. Every case runs in a fresh ``__main__`` namespace, and
+file descriptors 0, 1 and 2 are pointed at a fresh input file and fresh
+capture files before each case, so ``open(0)``, ``os.write(1, ...)`` and
+closing the standard streams behave as they would in a process of its own.
+The parent enforces per-case time limits by killing this process. Only the
+standard library is used because this runs outside Django.
+"""
+import builtins
+import fcntl
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import traceback
+
+
+class OutputLimitExceeded(BaseException):
+    """Raised into the submission once it has written more than it may."""
+
+
+def _format_exception(exc, skip_frames=1):
+    tb = exc.__traceback__
+    for _ in range(skip_frames):
+        if tb is not None:
+            tb = tb.tb_next
+    return ''.join(traceback.format_exception(type(exc), exc, tb))
+
+
+class CaptureWriter(io.RawIOBase):
+    """Write to ``fd``, stopping the submission once it has written more than ``limit`` bytes."""
+
+    def __init__(self, fd, limit):
+        super().__init__()
+        self.fd = fd
+        self.limit = limit
+        self.written = 0
+        self.truncated = False
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        if self.limit is not None and self.written + len(data) > self.limit:
+            os.write(self.fd, data[:max(0, self.limit - self.written)])
+            self.written = self.limit
+            self.truncated = True
+            raise OutputLimitExceeded('Output limit exceeded')
+        os.write(self.fd, data)
+        self.written += len(data)
+        return len(data)
+
+
+def standard_stream(writer, like):
+    """Wrap ``writer`` with the same buffering as the runner's own stream ``like``.
+
+    The runner starts like a submission process would (same interpreter,
+    environment and non-interactive streams), so this is the buffering a
+    submission would have had on its own, including under ``-u``.
+    """
+    if isinstance(like.buffer, io.RawIOBase):
+        return io.TextIOWrapper(writer, encoding='utf-8', write_through=True)
+    return io.TextIOWrapper(io.BufferedWriter(writer), encoding='utf-8', line_buffering=like.line_buffering)
+
+
+def private_file(data=b''):
+    """An anonymous file holding ``data``, on a descriptor above 0-2 (a case may have closed those)."""
+    with tempfile.TemporaryFile() as f:
+        f.write(data)
+        f.seek(0)
+        return fcntl.fcntl(f.fileno(), fcntl.F_DUPFD_CLOEXEC, 3)
+
+
+def read_capture(fd, limit):
+    """Return (everything written to the capture file ``fd`` up to ``limit``, whether it was more)."""
+    size = os.fstat(fd).st_size
+    read = size if limit is None else min(size, limit)
+    data = os.pread(fd, read, 0) if read else b''
+    return data.decode('utf-8', 'replace'), limit is not None and size > limit
+
+
+def reset_peak_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_kb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_case(code, data, compile_error, recursion_limit, output_limit=None):
+    input_fd, stdout_fd, stderr_fd = private_file(data.encode('utf-8')), private_file(), private_file()
+    try:
+        # The standard descriptors are set up afresh for every case, whatever the last one did to them.
+        os.dup2(input_fd, 0)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        return run_in_namespace(code, compile_error, recursion_limit, output_limit, stdout_fd, stderr_fd)
+    finally:
+        for fd in (input_fd, stdout_fd, stderr_fd):
+            os.close(fd)
+
+
+def run_in_namespace(code, compile_error, recursion_limit, output_limit, stdout_fd, stderr_fd):
+    stdin = io.TextIOWrapper(io.BufferedReader(io.FileIO(0, 'r', closefd=False)), encoding='utf-8')
+    stdout_writer, stderr_writer = CaptureWriter(1, output_limit), CaptureWriter(2, output_limit)
+    stdout = standard_stream(stdout_writer, sys.__stdout__)
+    stderr = standard_stream(stderr_writer, sys.__stderr__)
+
+    exit_code = 0
+    cpu_time = 0
+    if compile_error is not None:
+        stderr.write(compile_error)
+        exit_code = 1
+    else:
+        namespace = {'__name__': '__main__', '__file__': 'solution.py', '__builtins__': builtins}
+        sys.stdin, sys.stdout, sys.stderr = stdin, stdout, stderr
+        sys.argv = ['solution.py']
+        sys.setrecursionlimit(recursion_limit)
+        reset_peak_rss()
+        started = cpu_seconds()
+        try:
+            exec(code, namespace)
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                exit_code = e.code or 0
+            else:
+                stderr.write(f'{e.code}\n')
+                exit_code = 1
+        except OutputLimitExceeded:
+            exit_code = 1
+        except BaseException as e:
+            try:
+                stderr.write(_format_exception(e))
+            except OutputLimitExceeded:
+                pass
+            exit_code = 1
+        finally:
+            cpu_time = cpu_seconds() - started
+            sys.stdin, sys.stdout, sys.stderr = sys.__stdin__, sys.__stdout__, sys.__stderr__
+            sys.setrecursionlimit(recursion_limit)
+
+    for stream in (stdout, stderr):
+        try:
+            stream.flush()
+        except (ValueError, OSError, OutputLimitExceeded):
+            pass  # closed by the submission, or already over the limit
+    stdout_text, stdout_truncated = read_capture(stdout_fd, output_limit)
+    stderr_text, stderr_truncated = read_capture(stderr_fd, output_limit)
+    return {
+        'stdout': stdout_text,
+        'stderr': stderr_text,
+        'exit_code': exit_code,
+        'output_truncated': stdout_truncated or stderr_truncated or stdout_writer.truncated or stderr_writer.truncated,
+        'cpu_time': round(cpu_time, 3),
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def main():
+    source_path, command_fd, response_fd = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+    commands = os.fdopen(command_fd, 'r', encoding='utf-8')
+    responses = os.fdopen(response_fd, 'w', encoding='utf-8')
+
+    with open(source_path, encoding='utf-8') as f:
+        source = f.read()
+    code, compile_error = None, None
+    try:
+        code = compile(source, 'solution.py', 'exec')
+    except SyntaxError as e:
+        compile_error = _format_exception(e)
+
+    recursion_limit = sys.getrecursionlimit()
+    responses.write(json.dumps({'ready': True}) + '\n')
+    responses.flush()
+    for line in commands:
+        request = json.loads(line)
+        response = run_case(code, request['input'], compile_error, recursion_limit, request.get('output_limit'))
+        responses.write(json.dumps(response) + '\n')
+        responses.flush()
+
+
+if __name__ == '__main__':
+    main()
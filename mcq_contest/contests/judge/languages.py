@@ -0,0 +1,33 @@
+"""Per-language source, compile and run commands used by the judge."""
+
+LANGUAGES = {
+    'python': {
+        'source': 'solution.py',
+        'compile': None,
+        'run': ['python', '{source}'],
+        'harness': 'python',
+    },
+    'cpp': {
+        'source': 'solution.cpp',
+        'compile': ['g++', '{source}', '-o', '{binary}'],
+        'run': ['{binary}'],
+    },
+    'java': {
+        'source': 'Solution.java',
+        'compile': ['javac', '{source}'],
+        'run': ['java', '-Xmx256m', '-cp', '{workdir}', 'Solution'],
+        'harness': 'java',
+    },
+    'c': {
+        'source': 'solution.c',
+        'compile': ['gcc', '{source}', '-o', '{binary}'],
+        'run': ['{binary}'],
+    },
+}
+
+COMPILE_TIMEOUT_SECONDS = 10
+
+
+def render_command(template, **paths):
+    """Fill the {source}/{binary}/{workdir} placeholders of a command template."""
+    return [arg.format(**paths) for arg in template]
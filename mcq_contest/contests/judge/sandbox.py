@@ -0,0 +1,181 @@
+"""Run an untrusted process under resource limits with bounded output capture.
+
+Limits are a dict with optional keys (``None`` disables a limit):
+
+    cpu_seconds   RLIMIT_CPU for the process
+    memory_bytes  RLIMIT_AS (address space)
+    file_bytes    RLIMIT_FSIZE
+    output_bytes  stdout/stderr bytes kept before the process is killed
+
+There is deliberately no process limit: RLIMIT_NPROC counts every process
+and thread of the judge's user (and root ignores it), so it cannot bound
+one submission. Bound the judge as a whole instead, e.g. with the pid
+limit of its container.
+"""
+import os
+import resource
+import select
+import signal
+import subprocess
+import threading
+import time
+
+from django.conf import settings
+
+RLIMITS = (
+    ('cpu_seconds', resource.RLIMIT_CPU),
+    ('memory_bytes', resource.RLIMIT_AS),
+    ('file_bytes', resource.RLIMIT_FSIZE),
+)
+RSS_SAMPLE_SECONDS = 0.005
+
+
+def limits_for(language):
+    """Merge JUDGE_LIMITS with the overrides in JUDGE_LANGUAGE_LIMITS for ``language``."""
+    limits = dict(settings.JUDGE_LIMITS)
+    limits.update(settings.JUDGE_LANGUAGE_LIMITS.get(language, {}))
+    return limits
+
+
+def set_rlimits(limits):
+    """Return a ``preexec_fn`` applying ``limits`` in the child before exec."""
+    def preexec():
+        for key, rlimit in RLIMITS:
+            value = limits.get(key)
+            if value is not None:
+                # Hard CPU limit one second later, so SIGXCPU arrives before SIGKILL.
+                hard = value + 1 if rlimit == resource.RLIMIT_CPU else value
+                resource.setrlimit(rlimit, (value, hard))
+    return preexec
+
+
+class BoundedReader(threading.Thread):
+    """Drain a pipe, keeping at most ``limit`` bytes and calling ``on_overflow`` past it."""
+
+    def __init__(self, pipe, limit, on_overflow):
+        super().__init__(daemon=True)
+        self.pipe = pipe
+        self.limit = limit
+        self.on_overflow = on_overflow
+        self.chunks = []
+        self.size = 0
+        self.truncated = False
+
+    def run(self):
+        while True:
+            chunk = self.pipe.read1(65536) if hasattr(self.pipe, 'read1') else self.pipe.read(65536)
+            if not chunk:
+                break
+            if self.truncated:
+                continue
+            if self.limit is not None and self.size + len(chunk) > self.limit:
+                self.chunks.append(chunk[:self.limit - self.size])
+                self.size = self.limit
+                self.truncated = True
+                self.on_overflow()
+                continue
+            self.chunks.append(chunk)
+            self.size += len(chunk)
+        self.pipe.close()
+
+    def text(self):
+        return b''.join(self.chunks).decode('utf-8', 'replace')
+
+
+def read_peak_rss_kb(pid):
+    """Return VmHWM of a running process in KiB, or 0 once it is gone."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def kill_group(pid):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_process(cmd, stdin, time_limit, limits, cwd=None, on_start=None):
+    """Run ``cmd`` feeding ``stdin``; return stdout/stderr and usage.
+
+    ``on_start`` is called with the child's pid once it is running (its
+    process group has the same id, see ``kill_group``). The result has ``stdout``, ``stderr``, ``exit_code`` (negative for a
+    signal), ``timed_out``, ``output_truncated``, ``cpu_time`` (seconds)
+    and ``peak_rss_kb`` (sampled every ``RSS_SAMPLE_SECONDS``).
+    """
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        preexec_fn=set_rlimits(limits),
+        start_new_session=True
+    )
+    if on_start is not None:
+        on_start(process.pid)
+    output_limit = limits.get('output_bytes')
+    stdout = BoundedReader(process.stdout, output_limit, lambda: kill_group(process.pid))
+    stderr = BoundedReader(process.stderr, output_limit, lambda: kill_group(process.pid))
+    stdout.start()
+    stderr.start()
+
+    def feed():
+        try:
+            process.stdin.write((stdin or '').encode('utf-8'))
+        except OSError:
+            pass  # the process exited without reading all of its input
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    threading.Thread(target=feed, daemon=True).start()
+
+    # Sample the peak RSS from /proc while waiting: the rusage figure also
+    # counts the pages this process still shared with the child before exec.
+    # Popen only returns once the child has exec'd, so every sample is the
+    # submission's own.
+    pidfd = os.pidfd_open(process.pid)
+    deadline = time.monotonic() + time_limit
+    peak_rss_kb = 0
+    timed_out = False
+    try:
+        while True:
+            peak_rss_kb = max(peak_rss_kb, read_peak_rss_kb(process.pid))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            exited, _, _ = select.select([pidfd], [], [], min(remaining, RSS_SAMPLE_SECONDS))
+            if exited:
+                break
+    finally:
+        os.close(pidfd)
+    # Also reaps anything the submission forked into its session.
+    kill_group(process.pid)
+    _, code, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(code)
+    stdout.join()
+    stderr.join()
+
+    cpu_time = usage.ru_utime + usage.ru_stime
+    cpu_limit = limits.get('cpu_seconds')
+    if process.returncode in (-signal.SIGXCPU, -signal.SIGKILL) and cpu_limit is not None and cpu_time >= cpu_limit:
+        timed_out = True
+    return {
+        'stdout': stdout.text(),
+        'stderr': stderr.text(),
+        'exit_code': process.returncode,
+        'timed_out': timed_out,
+        'output_truncated': stdout.truncated or stderr.truncated,
+        'cpu_time': round(cpu_time, 3),
+        'peak_rss_kb': peak_rss_kb,
+    }
@@ -0,0 +1,345 @@
+"""Pre-forked judge worker pool served over a local unix socket.
+
+The master process owns the listening socket and one pool per language.
+Each pool forks a fixed number of worker processes up front and admits at
+most ``size + queue_size`` jobs at a time; anything beyond that is rejected
+immediately with a ``busy`` event so web workers never pile up behind the
+judge. Workers run ``executor.execute`` and stream its events back through
+the master to the client connection.
+
+Jobs in flight are shared and superseded: a request whose job spec is
+identical to one already running subscribes to that job instead of
+starting another, and a request carrying an ``owner`` (e.g. a student and
+question) cancels that owner's previous request, which receives a
+``superseded`` event. A job is cancelled, killing its processes, once no
+connection is waiting for it any more.
+
+Every worker is forked before the master starts any thread, so no child
+can inherit a lock held by another thread. A worker that crashes later is
+replaced through a ``forkserver``, which starts it from a clean process
+rather than forking the threaded master.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import threading
+import uuid
+
+import django
+
+from .executor import execute
+from .protocol import send_message, recv_message
+
+logger = logging.getLogger(__name__)
+
+mp = multiprocessing.get_context('fork')
+# Workers restarted once the master is running threads.
+respawn_mp = multiprocessing.get_context('forkserver')
+
+
+def worker_main(conn):
+    """Entry point of a worker: run jobs received from the master."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # A worker started by the forkserver has not loaded Django yet.
+    django.setup()
+    jobs = queue.Queue()
+    cancel = threading.Event()
+    current = {'id': None}
+    # Ids of jobs cancelled so far, including ones that have not started yet.
+    cancelled = set()
+
+    def read_commands():
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                cancel.set()
+                jobs.put(None)
+                return
+            if message['type'] == 'job':
+                jobs.put(message)
+            elif message['type'] == 'cancel':
+                cancelled.add(message['id'])
+                if message['id'] == current['id']:
+                    cancel.set()
+
+    threading.Thread(target=read_commands, daemon=True).start()
+
+    while True:
+        message = jobs.get()
+        if message is None:
+            return
+        current['id'] = message['id']
+        cancel.clear()
+        if message['id'] in cancelled:
+            cancelled.discard(message['id'])
+            conn.send({'event': 'done'})
+            continue
+        try:
+            for event in execute(message['job'], cancel):
+                conn.send(event)
+        except Exception as e:
+            logger.exception('Judge worker failed while executing a job')
+            conn.send({'event': 'error', 'error': f'Judge error: {e}'})
+            conn.send({'event': 'done'})
+        cancelled.discard(message['id'])
+
+
+def job_fingerprint(spec):
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class Job:
+    """A job and the connections subscribed to its events.
+
+    Events are kept so that a subscriber joining late still sees all of
+    them; the job is cancelled when its last subscriber leaves early.
+    """
+
+    def __init__(self, spec):
+        self.id = uuid.uuid4().hex
+        self.spec = spec
+        self.fingerprint = job_fingerprint(spec)
+        self.lock = threading.Lock()
+        self.history = []
+        self.subscribers = []
+        self.finished = False
+        self.cancelled = threading.Event()
+        self.worker = None
+
+    def subscribe(self):
+        """Return a queue receiving every event of the job, or None if it is over."""
+        events = queue.Queue()
+        with self.lock:
+            if self.finished or self.cancelled.is_set():
+                return None
+            for event in self.history:
+                events.put(event)
+            self.subscribers.append(events)
+        return events
+
+    def unsubscribe(self, events):
+        with self.lock:
+            if events in self.subscribers:
+                self.subscribers.remove(events)
+            orphaned = not self.subscribers and not self.finished
+        if orphaned:
+            self.cancel()
+
+    def publish(self, event):
+        with self.lock:
+            self.history.append(event)
+            if event['event'] == 'done':
+                self.finished = True
+            for events in self.subscribers:
+                events.put(event)
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.worker is not None:
+            self.worker.cancel(self)
+
+
+class Worker:
+    """Master-side handle for one forked worker process."""
+
+    def __init__(self, language):
+        self.language = language
+        self.send_lock = threading.Lock()
+        self.process = None
+        self.conn = None
+
+    def start(self, context=mp):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=worker_main,
+            args=(child_conn,),
+            name=f'judge-{self.language}',
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def restart(self):
+        logger.warning(f'Restarting {self.language} judge worker (pid {self.process.pid})')
+        self.stop()
+        self.start(respawn_mp)
+
+    def stop(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        if self.conn is not None:
+            self.conn.close()
+
+    def cancel(self, job):
+        with self.send_lock:
+            try:
+                self.conn.send({'type': 'cancel', 'id': job.id})
+            except OSError:
+                pass
+
+    def run(self, job):
+        job.worker = self
+        try:
+            with self.send_lock:
+                self.conn.send({'type': 'job', 'id': job.id, 'job': job.spec})
+            while True:
+                event = self.conn.recv()
+                job.publish(event)
+                if event['event'] == 'done':
+                    return
+        except (EOFError, OSError):
+            job.publish({'event': 'error', 'error': 'Judge worker crashed'})
+            job.publish({'event': 'done'})
+            self.restart()
+        finally:
+            job.worker = None
+
+
+class LanguagePool:
+    def __init__(self, language, size, queue_size):
+        self.language = language
+        self.size = size
+        self.slots = threading.BoundedSemaphore(size + queue_size)
+        self.jobs = queue.Queue()
+        self.workers = [Worker(language) for _ in range(size)]
+
+    def start_workers(self):
+        for worker in self.workers:
+            worker.start()
+
+    def start_dispatchers(self):
+        for worker in self.workers:
+            threading.Thread(target=self._dispatch, args=(worker,), daemon=True).start()
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def submit(self, job, block=False):
+        """Queue ``job``; return False if the pool is full and ``block`` is not set."""
+        if not self.slots.acquire(blocking=block):
+            return False
+        self.jobs.put(job)
+        return True
+
+    def _dispatch(self, worker):
+        while True:
+            job = self.jobs.get()
+            try:
+                if job.cancelled.is_set():
+                    job.publish({'event': 'done'})
+                    continue
+                job.publish({'event': 'started'})
+                worker.run(job)
+            finally:
+                self.slots.release()
+
+
+class JudgeServer:
+    def __init__(self, socket_path, workers, queue_size=0):
+        self.socket_path = socket_path
+        self.pools = {
+            language: LanguagePool(language, size, queue_size)
+            for language, size in workers.items()
+        }
+        self.sock = None
+        self.lock = threading.Lock()
+        self.in_flight = {}  # job fingerprint -> Job
+        self.owners = {}  # owner -> (Job, subscription) of the owner's latest request
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path) or '.', exist_ok=True)
+        for pool in self.pools.values():
+            pool.start_workers()
+        for pool in self.pools.values():
+            pool.start_dispatchers()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        self.sock.listen(128)
+        logger.info(f'Judge listening on {self.socket_path}')
+        try:
+            while True:
+                conn, _ = self.sock.accept()
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        for pool in self.pools.values():
+            pool.stop()
+
+    def _subscribe(self, spec, owner):
+        """Return ``(job, events, created)``, joining an identical job in flight if there is one."""
+        fingerprint = job_fingerprint(spec)
+        with self.lock:
+            job = self.in_flight.get(fingerprint)
+            events = job.subscribe() if job is not None else None
+            created = events is None
+            if created:
+                job = Job(spec)
+                events = job.subscribe()
+                self.in_flight[fingerprint] = job
+            previous = self.owners.get(owner) if owner is not None else None
+            if owner is not None:
+                self.owners[owner] = (job, events)
+        if previous is not None:
+            previous_job, previous_events = previous
+            previous_events.put({'event': 'superseded'})
+            previous_job.unsubscribe(previous_events)
+        return job, events, created
+
+    def _unsubscribe(self, job, events, owner):
+        job.unsubscribe(events)
+        with self.lock:
+            if owner is not None and self.owners.get(owner, (None, None))[1] is events:
+                del self.owners[owner]
+            if self.in_flight.get(job.fingerprint) is job and (job.finished or job.cancelled.is_set()):
+                del self.in_flight[job.fingerprint]
+
+    def _handle(self, conn):
+        job = events = owner = None
+        try:
+            message = recv_message(conn)
+            if message is None or message.get('type') != 'job':
+                return
+            spec = message['job']
+            owner = message.get('owner')
+            pool = self.pools.get(spec.get('language'))
+            if pool is None:
+                send_message(conn, {'event': 'error', 'error': f"Unsupported language: {spec.get('language')}"})
+                send_message(conn, {'event': 'done'})
+                return
+            job, events, created = self._subscribe(spec, owner)
+            if created and not pool.submit(job, block=message.get('block', False)):
+                # Anyone who joined in the meantime is turned away as well.
+                job.publish({'event': 'busy'})
+                job.publish({'event': 'done'})
+                send_message(conn, {'event': 'busy'})
+                return
+            send_message(conn, {'event': 'queued', 'job_id': job.id})
+            while True:
+                event = events.get()
+                send_message(conn, event)
+                if event['event'] in ('done', 'busy', 'superseded'):
+                    return
+        except (OSError, ValueError) as e:
+            logger.info(f'Judge client disconnected: {e}')
+        finally:
+            if job is not None:
+                self._unsubscribe(job, events, owner)
+            conn.close()
@@ -0,0 +1,214 @@
+"""Ways of running one compiled submission against a sequence of inputs.
+
+A session's ``run_case(stdin, time_limit)`` returns
+``{'stdout', 'stderr', 'exit_code', 'timed_out', 'output_truncated', 'error',
+'cpu_time', 'peak_rss_kb'}``; ``close()`` releases any process it keeps around between
+cases and ``kill()`` (safe to call from another thread) kills whatever is
+running right now, making the current ``run_case`` return early. Submissions always run under the sandbox limits of the session.
+"""
+import json
+import math
+import os
+import select
+import subprocess
+import time
+
+from .sandbox import kill_group, run_process, set_rlimits
+
+HARNESS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'harness')
+HARNESS_START_TIMEOUT_SECONDS = 10
+# How long a runner that the submission told to exit gets to finish its shutdown hooks.
+HARNESS_EXIT_TIMEOUT_SECONDS = 5
+
+
+def raw_result(stdout='', stderr='', exit_code=None, timed_out=False, output_truncated=False, error=None,
+               cpu_time=None, peak_rss_kb=None):
+    return {
+        'stdout': stdout,
+        'stderr': stderr,
+        'exit_code': exit_code,
+        'timed_out': timed_out,
+        'output_truncated': output_truncated,
+        'error': error,
+        'cpu_time': cpu_time,
+        'peak_rss_kb': peak_rss_kb,
+    }
+
+
+class ProcessSession:
+    """Start a fresh sandboxed process for every case."""
+
+    def __init__(self, cmd, cwd=None, limits=None):
+        self.cmd = cmd
+        self.cwd = cwd
+        self.limits = limits or {}
+        self.pid = None
+
+    def run_case(self, stdin, time_limit):
+        limits = dict(self.limits, cpu_seconds=math.ceil(time_limit))
+        try:
+            process = run_process(self.cmd, stdin, time_limit, limits, cwd=self.cwd, on_start=self._started)
+        except (subprocess.SubprocessError, OSError) as e:
+            return raw_result(error=str(e))
+        finally:
+            self.pid = None
+        return raw_result(
+            stdout=process['stdout'],
+            stderr=process['stderr'],
+            exit_code=process['exit_code'],
+            timed_out=process['timed_out'],
+            output_truncated=process['output_truncated'],
+            cpu_time=process['cpu_time'],
+            peak_rss_kb=process['peak_rss_kb']
+        )
+
+    def _started(self, pid):
+        self.pid = pid
+
+    def kill(self):
+        pid = self.pid
+        if pid is not None:
+            kill_group(pid)
+
+    def close(self):
+        pass
+
+
+class HarnessSession:
+    """Keep one long-lived runner process and feed it cases over a pipe.
+
+    The runner speaks newline-delimited JSON on two extra file descriptors
+    (passed as its last two arguments), announces ``{"ready": true}`` once
+    it has loaded the submission and answers each
+    ``{"output_limit": ..., "input": ...}`` with ``{"stdout", "stderr",
+    "exit_code", "output_truncated", "cpu_time", "peak_rss_kb"}``. Start-up
+    is not counted against the time limit; a case that overruns kills the
+    runner, and the next case starts a new one. The runner process gets the
+    memory/file limits; CPU time is bounded by the per-case wall
+    clock instead, since one process serves many cases.
+    """
+
+    def __init__(self, cmd, cwd=None, limits=None):
+        self.cmd = cmd
+        self.cwd = cwd
+        self.limits = dict(limits or {}, cpu_seconds=None)
+        self.process = None
+        self.commands = None
+        self.responses = None
+        self.buffer = b''
+
+    def _start(self):
+        command_read, command_write = os.pipe()
+        response_read, response_write = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                self.cmd + [str(command_read), str(response_write)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                pass_fds=(command_read, response_write),
+                cwd=self.cwd,
+                preexec_fn=set_rlimits(self.limits),
+                start_new_session=True
+            )
+        except OSError:
+            for fd in (command_read, command_write, response_read, response_write):
+                os.close(fd)
+            raise
+        os.close(command_read)
+        os.close(response_write)
+        self.commands = os.fdopen(command_write, 'w', encoding='utf-8')
+        self.responses = response_read
+        self.buffer = b''
+        ready = self._read_message(time.monotonic() + HARNESS_START_TIMEOUT_SECONDS)
+        if not ready or not ready.get('ready'):
+            self.close()
+            raise OSError('Runner failed to start')
+
+    def _read_message(self, deadline):
+        """Return the next JSON message, None on EOF, or raise TimeoutError."""
+        while b'\n' not in self.buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError
+            readable, _, _ = select.select([self.responses], [], [], remaining)
+            if not readable:
+                raise TimeoutError
+            chunk = os.read(self.responses, 65536)
+            if not chunk:
+                return None
+            self.buffer += chunk
+        line, self.buffer = self.buffer.split(b'\n', 1)
+        return json.loads(line)
+
+    def run_case(self, stdin, time_limit):
+        try:
+            if self.process is None:
+                self._start()
+            request = {'output_limit': self.limits.get('output_bytes'), 'input': stdin or ''}
+            self.commands.write(json.dumps(request) + '\n')
+            self.commands.flush()
+            message = self._read_message(time.monotonic() + time_limit)
+        except TimeoutError:
+            self.close()
+            return raw_result(timed_out=True)
+        except (OSError, ValueError) as e:
+            self.close()
+            return raw_result(error=str(e))
+        if message is None:
+            returncode = self.process.wait()
+            self.close()
+            return raw_result(error=f'Runtime error (exit code {returncode})')
+        exit_code = message.get('exit_code')
+        if message.get('exited'):
+            # The submission terminated the runner itself (e.g. System.exit),
+            # so the runner exits with the submission's status.
+            try:
+                exit_code = self.process.wait(HARNESS_EXIT_TIMEOUT_SECONDS)
+            except subprocess.TimeoutExpired:
+                exit_code = None
+            self.close()
+        return raw_result(
+            stdout=message['stdout'],
+            stderr=message['stderr'],
+            exit_code=exit_code,
+            output_truncated=message.get('output_truncated', False),
+            cpu_time=message.get('cpu_time'),
+            peak_rss_kb=message.get('peak_rss_kb')
+        )
+
+    def kill(self):
+        process = self.process
+        if process is not None:
+            kill_group(process.pid)
+
+    def close(self):
+        if self.process is None:
+            return
+        kill_group(self.process.pid)
+        self.process.wait()
+        try:
+            self.commands.close()
+        except OSError:
+            pass
+        os.close(self.responses)
+        self.process = None
+        self.commands = None
+        self.responses = None
+        self.buffer = b''
+
+
+def python_harness_command(interpreter, source):
+    return [interpreter, os.path.join(HARNESS_DIR, 'python_harness.py'), source]
+
+
+JAVA_RUNNER_SPEC = {'source': 'JudgeRunner.java', 'compile': ['javac', '{source}']}
+
+
+def java_runner_source():
+    with open(os.path.join(HARNESS_DIR, JAVA_RUNNER_SPEC['source'])) as f:
+        return f.read()
+
+
+def java_runner_command(runner_dir, class_dir):
+    return ['java', '-Xmx256m', '-cp', runner_dir, 'JudgeRunner', class_dir]
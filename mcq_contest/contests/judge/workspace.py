@@ -0,0 +1,79 @@
+"""Reusable scratch directories for judge jobs.
+
+Each judge process keeps a small pool of workspaces under
+``JUDGE_WORKSPACE_ROOT`` (RAM-backed ``/dev/shm`` by default), named
+``ws-<pid>-*``. A job borrows one with ``WorkspacePool.workspace()``; on
+return the directory is swapped for a fresh empty one and the used tree is
+removed in one ``rmtree``, so nothing is cleaned file by file while the job
+is still holding it. Workspaces left behind by dead processes are removed
+when a new pool starts.
+"""
+import logging
+import os
+import queue
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'ws-'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class WorkspacePool:
+    def __init__(self, root, size):
+        self.root = root
+        self.size = size
+        self.pid = os.getpid()
+        self.free = queue.LifoQueue()
+        os.makedirs(root, exist_ok=True)
+        self._remove_orphans()
+        for _ in range(size):
+            self.free.put(self._create())
+
+    def _create(self):
+        return tempfile.mkdtemp(prefix=f'{PREFIX}{self.pid}-', dir=self.root)
+
+    def _remove_orphans(self):
+        for entry in os.scandir(self.root):
+            pid = entry.name[len(PREFIX):].split('-', 1)[0]
+            if entry.name.startswith(PREFIX) and pid.isdigit() and not _pid_alive(int(pid)):
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def acquire(self):
+        """Return an empty workspace, creating an extra one if the pool is exhausted."""
+        try:
+            return self.free.get_nowait()
+        except queue.Empty:
+            return self._create()
+
+    def release(self, path):
+        """Wipe ``path`` and hand a clean workspace back to the pool."""
+        trash = f'{path}.trash'
+        try:
+            os.rename(path, trash)
+        except OSError:
+            logger.error(f'Could not recycle workspace {path}')
+            return
+        if self.free.qsize() < self.size:
+            os.mkdir(path, 0o700)
+            self.free.put(path)
+        shutil.rmtree(trash, ignore_errors=True)
+
+    @contextmanager
+    def workspace(self):
+        path = self.acquire()
+        try:
+            yield path
+        finally:
+            self.release(path)
@@ -0,0 +1,242 @@
+"""Live contest leaderboards over WebSockets.
+
+Admins connect to ``ws/contests/<id>/leaderboard/?token=<access token>``
+(the JWT goes in the query string because browsers cannot set headers on a
+WebSocket). A viewer first receives a ``snapshot`` of the whole ranking
+and then a ``delta`` whenever it changes:
+
+    {'type': 'snapshot', 'participant_count': int, 'entries': [entry, ...]}
+    {'type': 'delta', 'participant_count': int, 'changed': [entry, ...], 'removed': [student_name, ...]}
+
+where an entry is ``{'rank', 'student_name', 'score', 'submitted_at'}``,
+as in ``contest_leaderboard``. ``changed`` holds every entry whose rank or
+values changed, so a viewer keeps its copy of the ranking up to date
+without asking the server again. A ``snapshot`` is sent again to a viewer
+that fell behind. Each process keeps one ``LeaderboardBroadcaster`` per
+watched contest: it checks the contest's ``LeaderboardEntry`` rows every
+``LEADERBOARD_PUSH_SECONDS`` with one small aggregate query and, when that
+changes, reads only the entries written since the last check and ranks
+them once for all its viewers, so the database load does not grow with the
+number of viewers.
+"""
+import asyncio
+import json
+import logging
+import re
+from datetime import timedelta
+from urllib.parse import parse_qs
+
+import pytz
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Max
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .models import Contest, LeaderboardEntry
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_PATH = re.compile(r'^/?ws/contests/(?P<contest_id>\d+)/leaderboard/?$')
+
+# How far back each check re-reads entries, for transactions that commit late.
+LATE_COMMIT_SECONDS = 30
+
+# Close codes sent before the socket is accepted.
+CLOSE_UNAUTHORIZED = 4403
+CLOSE_NOT_FOUND = 4404
+
+
+def leaderboard_version(contest_id):
+    """Changes whenever an entry of the contest is written, added or removed."""
+    return tuple(LeaderboardEntry.objects.filter(contest_id=contest_id).aggregate(
+        updated=Max('updated_at'), count=Count('id')
+    ).values())
+
+
+def load_entries(contest_id, since=None):
+    """Return ``{student_name: (ranking key, entry)}`` for the entries written at or after ``since`` (all if None).
+
+    The ranking key sorts entries in ``LeaderboardEntry.objects.ranked()`` order.
+    """
+    tz = pytz.timezone('Asia/Kolkata')
+    entries = LeaderboardEntry.objects.filter(contest_id=contest_id)
+    if since is not None:
+        entries = entries.filter(updated_at__gte=since)
+    return {
+        student_name: ((-score, submitted_at, entry_id), {
+            'student_name': student_name,
+            'score': score,
+            'submitted_at': submitted_at.astimezone(tz).isoformat()
+        })
+        for entry_id, student_name, score, submitted_at in entries.values_list(
+            'id', 'student__username', 'score', 'submitted_at'
+        ).iterator()
+    }
+
+
+def load_changes(contest_id, since, known, count):
+    """Return (entries that differ from ``known``, names of ``known`` no longer ranked).
+
+    Entries written shortly before ``since`` are read again, in case their
+    transaction committed after the previous check. ``count`` is the
+    current number of entries; the names still ranked are only read when it
+    shows that some were removed.
+    """
+    written = load_entries(contest_id, since - timedelta(seconds=LATE_COMMIT_SECONDS) if since else None)
+    changed = {name: value for name, value in written.items() if known.get(name) != value}
+    removed = []
+    if len(known.keys() | written.keys()) != count:
+        ranked = set(LeaderboardEntry.objects.filter(contest_id=contest_id).values_list('student__username', flat=True))
+        removed = [name for name in known if name not in ranked]
+    return changed, removed
+
+
+def rank_entries(entries):
+    """Return the ranked entries of ``{student_name: (ranking key, entry)}``, each with its ``rank``."""
+    ordered = sorted(entries.values(), key=lambda value: value[0])
+    return [dict(entry, rank=rank) for rank, (_, entry) in enumerate(ordered, start=1)]
+
+
+class LeaderboardBroadcaster:
+    """Watch one contest's leaderboard and push its changes to every subscribed viewer."""
+
+    def __init__(self, contest_id):
+        self.contest_id = contest_id
+        self.viewers = set()
+        self.entries = {}
+        self.ranking = []
+        self.version = None
+        self.refresh_lock = asyncio.Lock()
+        self.task = None
+
+    def snapshot(self):
+        return {'type': 'snapshot', 'participant_count': len(self.ranking), 'entries': self.ranking}
+
+    async def subscribe(self):
+        queue = asyncio.Queue(maxsize=settings.LEADERBOARD_VIEWER_QUEUE)
+        if self.version is None:
+            await self.refresh()
+        self.viewers.add(queue)
+        queue.put_nowait(self.snapshot())
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.viewers.discard(queue)
+
+    def publish(self, message):
+        for queue in self.viewers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # The viewer fell behind; let it start over from the current state.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot())
+
+    async def refresh(self):
+        async with self.refresh_lock:
+            version = await sync_to_async(leaderboard_version)(self.contest_id)
+            if version == self.version:
+                return
+            if self.version is None:
+                self.entries = await sync_to_async(load_entries)(self.contest_id)
+                self.ranking = rank_entries(self.entries)
+                self.version = version
+                return
+            changed, removed = await sync_to_async(load_changes)(
+                self.contest_id, self.version[0], self.entries, version[1]
+            )
+            self.version = version
+            if not changed and not removed:
+                return
+            self.entries.update(changed)
+            for name in removed:
+                del self.entries[name]
+            previous = {entry['student_name']: entry for entry in self.ranking}
+            self.ranking = rank_entries(self.entries)
+            self.publish({
+                'type': 'delta',
+                'participant_count': len(self.ranking),
+                'changed': [entry for entry in self.ranking if previous.get(entry['student_name']) != entry],
+                'removed': removed
+            })
+
+    async def run(self):
+        while self.viewers:
+            await asyncio.sleep(settings.LEADERBOARD_PUSH_SECONDS)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception(f"Could not refresh the leaderboard of contest {self.contest_id}")
+        _broadcasters.pop(self.contest_id, None)
+
+
+_broadcasters = {}
+
+
+def get_broadcaster(contest_id):
+    broadcaster = _broadcasters.get(contest_id)
+    if broadcaster is None:
+        broadcaster = _broadcasters[contest_id] = LeaderboardBroadcaster(contest_id)
+    return broadcaster
+
+
+def authenticate_admin(scope, contest_id):
+    """Return the close code for a connection that may not watch ``contest_id``, else None."""
+    token = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('token', [None])[0]
+    if not token:
+        return CLOSE_UNAUTHORIZED
+    authentication = JWTAuthentication()
+    try:
+        user = authentication.get_user(authentication.get_validated_token(token))
+    except (InvalidToken, AuthenticationFailed):
+        return CLOSE_UNAUTHORIZED
+    if user.role != 'admin':
+        logger.info(f"Unauthorized leaderboard socket by user {user.username} with role {user.role}")
+        return CLOSE_UNAUTHORIZED
+    if not Contest.objects.filter(id=contest_id).exists():
+        return CLOSE_NOT_FOUND
+    return None
+
+
+async def leaderboard_socket(scope, receive, send):
+    """ASGI application for WebSocket connections."""
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    match = LEADERBOARD_PATH.match(scope['path'])
+    if match is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+    contest_id = int(match.group('contest_id'))
+    close_code = await sync_to_async(authenticate_admin)(scope, contest_id)
+    if close_code is not None:
+        await send({'type': 'websocket.close', 'code': close_code})
+        return
+    await send({'type': 'websocket.accept'})
+
+    broadcaster = get_broadcaster(contest_id)
+    queue = await broadcaster.subscribe()
+    disconnected = asyncio.create_task(wait_for_disconnect(receive))
+    try:
+        while True:
+            next_message = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait({next_message, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                next_message.cancel()
+                return
+            await send({'type': 'websocket.send', 'text': json.dumps(next_message.result())})
+    finally:
+        broadcaster.unsubscribe(queue)
+        disconnected.cancel()
+
+
+async def wait_for_disconnect(receive):
+    """Ignore anything the viewer sends until it goes away."""
+    while True:
+        message = await receive()
+        if message['type'] == 'websocket.disconnect':
+            return
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from contests.models import Contest
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored max_score and question_count of every contest.'
+
+    def handle(self, *args, **options):
+        updated = Contest.objects.all().refresh_totals()
+        self.stdout.write(f'Updated totals of {updated} contests')
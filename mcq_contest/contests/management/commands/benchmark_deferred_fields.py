@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from contests.models import Attempt
+
+
+def fetched(queryset):
+    """Return (rows, bytes) the database sends back for ``queryset``."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return len(rows), sum(len(str(value)) for row in rows for value in row if value is not None)
+
+
+class Command(BaseCommand):
+    help = 'Compare bytes fetched by the main read paths with and without the deferred JSON columns.'
+
+    def handle(self, *args, **options):
+        paths = [
+            (
+                'final attempts',
+                Attempt._base_manager.filter(is_final=True),
+                Attempt.objects.filter(is_final=True),
+            ),
+        ]
+        self.stdout.write(f"{'read path':<20} {'rows':>8} {'all columns':>14} {'deferred':>14} {'saved':>7}")
+        for name, full, deferred in paths:
+            rows, full_bytes = fetched(full)
+            _, deferred_bytes = fetched(deferred)
+            saved = 100 * (1 - deferred_bytes / full_bytes) if full_bytes else 0
+            self.stdout.write(f'{name:<20} {rows:>8} {full_bytes:>14} {deferred_bytes:>14} {saved:>6.1f}%')
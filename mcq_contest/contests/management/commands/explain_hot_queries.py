@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+
+from contests.models import Attempt, Contest, LeaderboardEntry
+
+
+def hot_queries(contest_id, student_id):
+    """The lookups of the contest views, as (name, model scanned, queryset)."""
+    return [
+        (
+            'student_dashboard',
+            Attempt,
+            Contest.objects.annotate(
+                attempted=Exists(Attempt.objects.filter(contest=OuterRef('pk'), student_id=student_id))
+            ).only('id'),
+        ),
+        (
+            'attempt_contest',
+            Attempt,
+            Attempt.objects.filter(contest_id=contest_id, student_id=student_id, is_final=False),
+        ),
+        (
+            'submit_contest',
+            Attempt,
+            Attempt.objects.filter(contest_id=contest_id, student_id=student_id, is_final=True),
+        ),
+        (
+            'student_scores',
+            Attempt,
+            Attempt.objects.filter(student_id=student_id, is_final=True).select_related('contest'),
+        ),
+        (
+            'contest_leaderboard',
+            LeaderboardEntry,
+            LeaderboardEntry.objects.filter(contest_id=contest_id).select_related('student').ranked()[:50],
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot queries of the contest views and check that none scans a whole table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--planner-default', action='store_true',
+            help="Keep sequential scans enabled. On a small database the planner prefers them, "
+                 "so by default they are disabled to show which index each query would use."
+        )
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan of every query.')
+
+    def handle(self, *args, **options):
+        sample = Attempt.objects.values('contest_id', 'student_id').first() or {'contest_id': 0, 'student_id': 0}
+        failed = []
+        with transaction.atomic():
+            if not options['planner_default']:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for name, model, queryset in hot_queries(sample['contest_id'], sample['student_id']):
+                table = model._meta.db_table
+                plan = queryset.explain()
+                scans = [
+                    line.strip().lstrip('-> ') for line in plan.splitlines()
+                    if f' {table} ' in line and 'Scan' in line
+                ]
+                ok = bool(scans) and not any(scan.startswith('Seq Scan') for scan in scans)
+                if not ok:
+                    failed.append(f'{name} ({table})')
+                self.stdout.write(f"{'ok  ' if ok else 'FAIL'} {name:<20} {'; '.join(scans) or 'no scan of ' + table}")
+                if options['verbose_plans']:
+                    self.stdout.write(plan)
+        if failed:
+            raise CommandError(f"Sequential scan in: {', '.join(failed)}")
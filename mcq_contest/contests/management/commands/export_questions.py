@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contests.models import Contest, Question
+from contests.question_bank import export_questions
+
+
+class Command(BaseCommand):
+    help = 'Write the questions of one or more contests as an NDJSON question bank.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('contest_ids', nargs='+', type=int)
+        parser.add_argument('--output', '-o', help='File to write (default: standard output).')
+
+    def handle(self, *args, **options):
+        missing = set(options['contest_ids']) - set(
+            Contest.objects.filter(id__in=options['contest_ids']).values_list('id', flat=True)
+        )
+        if missing:
+            raise CommandError(f"Contest not found: {', '.join(str(contest_id) for contest_id in sorted(missing))}")
+        questions = Question.objects.filter(contest_id__in=options['contest_ids'])
+        out = open(options['output'], 'w', encoding='utf-8') if options['output'] else sys.stdout
+        count = 0
+        try:
+            for line in export_questions(questions):
+                out.write(line)
+                count += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        self.stderr.write(f'Exported {count} questions')
@@ -0,0 +1,31 @@
+import sys
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from contests.models import Contest
+from contests.question_bank import import_questions
+from contests.question_cache import invalidate_student_questions
+
+
+class Command(BaseCommand):
+    help = 'Add the questions of an NDJSON question bank to a contest.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('contest_id', type=int)
+        parser.add_argument('path', nargs='?', default='-', help='Bank to read (default: standard input).')
+
+    def handle(self, *args, **options):
+        contest = Contest.objects.filter(id=options['contest_id']).first()
+        if contest is None:
+            raise CommandError(f"Contest not found: {options['contest_id']}")
+        bank = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        try:
+            imported = import_questions(contest, bank)
+        except ValidationError as e:
+            raise CommandError('; '.join(e.messages))
+        finally:
+            if bank is not sys.stdin:
+                bank.close()
+        invalidate_student_questions(contest.id)
+        self.stdout.write(f'Imported {imported} questions into contest {contest.id}')
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from contests.answer_key import AnswerKey, regrade_attempts
+from contests.models import Attempt, Contest
+
+
+class Command(BaseCommand):
+    help = "Rescore the objective answers of a contest's final attempts against its current answer key."
+
+    def add_arguments(self, parser):
+        parser.add_argument('contest_id', type=int)
+        parser.add_argument('--batch-size', type=int, default=1000, help='Attempts locked and rescored per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many attempts would change.')
+
+    def handle(self, *args, **options):
+        contest = Contest.objects.filter(id=options['contest_id']).first()
+        if contest is None:
+            raise CommandError(f"Contest not found: {options['contest_id']}")
+        key = AnswerKey.for_contest(contest)
+        attempt_ids = list(
+            Attempt.objects.filter(contest=contest, is_final=True).order_by('id').values_list('id', flat=True)
+        )
+        batch_size = max(options['batch_size'], 1)
+        changed = 0
+        for start in range(0, len(attempt_ids), batch_size):
+            changed += regrade_attempts(key, attempt_ids[start:start + batch_size], save=not options['dry_run'])
+        verb = 'Would change' if options['dry_run'] else 'Changed'
+        self.stdout.write(f'{verb} {changed} of {len(attempt_ids)} final attempts of contest {contest.id}')
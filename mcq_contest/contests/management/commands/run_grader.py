@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from contests.grading import claim_next_job, process_job
+
+
+class Command(BaseCommand):
+    help = 'Grade submitted coding answers in the background (run one or more of these next to run_judge).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once there are no pending jobs.')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Grader started')
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(settings.GRADING_POLL_SECONDS)
+                continue
+            self.stdout.write(f'Grading job {job.id} ({job.total_questions} coding questions)')
+            process_job(job)
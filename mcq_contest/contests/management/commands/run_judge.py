@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from contests.judge.server import JudgeServer
+
+
+class Command(BaseCommand):
+    help = 'Start the pre-forked code execution worker pool used by run_code and contest grading.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.JUDGE_SOCKET_PATH, help='Unix socket path to listen on.')
+        parser.add_argument('--queue-size', type=int, default=settings.JUDGE_QUEUE_SIZE,
+                            help='Jobs allowed to wait per language once every worker is busy.')
+
+    def handle(self, *args, **options):
+        server = JudgeServer(options['socket'], settings.JUDGE_WORKERS, options['queue_size'])
+        workers = ', '.join(f'{language}={size}' for language, size in settings.JUDGE_WORKERS.items())
+        self.stdout.write(f"Starting judge on {options['socket']} ({workers})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Judge stopped')
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contests", "0003_gradingjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contest",
+            name="max_score",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="contest",
+            name="question_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
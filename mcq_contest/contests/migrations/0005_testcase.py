@@ -0,0 +1,95 @@
+# Generated by Django 5.2 on 2026-10-17 17:54
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _hash(input_data, output_data):
+    digest = hashlib.sha256()
+    digest.update(input_data.encode("utf-8") + b"\0")
+    digest.update(output_data.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def copy_test_cases(apps, schema_editor):
+    Question = apps.get_model("contests", "Question")
+    TestCase = apps.get_model("contests", "TestCase")
+    for question in Question.objects.exclude(
+        visible_test_cases=None, invisible_test_cases=None
+    ).iterator():
+        rows = []
+        cases = [(False, tc) for tc in question.visible_test_cases or []]
+        cases += [(True, tc) for tc in question.invisible_test_cases or []]
+        for ordinal, (hidden, tc) in enumerate(cases, start=1):
+            input_data, output_data = str(tc.get("input", "")), str(
+                tc.get("output", "")
+            )
+            rows.append(
+                TestCase(
+                    question=question,
+                    ordinal=ordinal,
+                    is_hidden=hidden,
+                    input=input_data,
+                    output=output_data,
+                    content_hash=_hash(input_data, output_data),
+                )
+            )
+        TestCase.objects.bulk_create(rows)
+
+
+def restore_test_cases(apps, schema_editor):
+    Question = apps.get_model("contests", "Question")
+    TestCase = apps.get_model("contests", "TestCase")
+    for question in Question.objects.filter(test_cases__isnull=False).distinct():
+        cases = TestCase.objects.filter(question=question).order_by("ordinal")
+        question.visible_test_cases = [
+            {"input": tc.input, "output": tc.output} for tc in cases if not tc.is_hidden
+        ]
+        question.invisible_test_cases = [
+            {"input": tc.input, "output": tc.output} for tc in cases if tc.is_hidden
+        ]
+        question.save(update_fields=["visible_test_cases", "invisible_test_cases"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contests", "0004_contest_totals"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TestCase",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("ordinal", models.IntegerField()),
+                ("is_hidden", models.BooleanField(default=True)),
+                ("input", models.TextField(blank=True)),
+                ("output", models.TextField(blank=True)),
+                ("content_hash", models.CharField(editable=False, max_length=64)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="test_cases",
+                        to="contests.question",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["question", "is_hidden", "ordinal"],
+                "unique_together": {("question", "ordinal")},
+            },
+        ),
+        migrations.RunPython(copy_test_cases, restore_test_cases),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 17:54
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contests", "0005_testcase"),
+    ]
+
+    # Separate from 0005 so the copied rows are committed before the
+    # question table is altered.
+    operations = [
+        migrations.RemoveField(
+            model_name="question",
+            name="invisible_test_cases",
+        ),
+        migrations.RemoveField(
+            model_name="question",
+            name="visible_test_cases",
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-17 17:57
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking writes to the attempts table.
+    atomic = False
+
+    dependencies = [
+        ("contests", "0006_remove_question_test_case_fields"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="attempt",
+            index=models.Index(
+                condition=models.Q(("is_final", True)),
+                fields=["contest", "-score"],
+                name="attempt_final_contest_score",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="attempt",
+            index=models.Index(
+                condition=models.Q(("is_final", True)),
+                fields=["student", "-submitted_at"],
+                name="attempt_final_student_recent",
+            ),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2 on 2026-10-17 17:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_leaderboard(apps, schema_editor):
+    Attempt = apps.get_model("contests", "Attempt")
+    LeaderboardEntry = apps.get_model("contests", "LeaderboardEntry")
+    final_attempts = Attempt.objects.filter(is_final=True).values_list(
+        "id", "contest_id", "student_id", "score", "submitted_at"
+    )
+    LeaderboardEntry.objects.bulk_create(
+        [
+            LeaderboardEntry(
+                attempt_id=attempt_id,
+                contest_id=contest_id,
+                student_id=student_id,
+                score=score,
+                submitted_at=submitted_at,
+            )
+            for attempt_id, contest_id, student_id, score, submitted_at in final_attempts.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contests", "0007_attempt_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaderboardEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.IntegerField(default=0)),
+                ("submitted_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "attempt",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leaderboard_entry",
+                        to="contests.attempt",
+                    ),
+                ),
+                (
+                    "contest",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leaderboard_entries",
+                        to="contests.contest",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leaderboard_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["contest", "-score", "submitted_at", "id"],
+                        name="leaderboard_rank",
+                    )
+                ],
+                "unique_together": {("contest", "student")},
+            },
+        ),
+        migrations.RunPython(fill_leaderboard, migrations.RunPython.noop),
+    ]
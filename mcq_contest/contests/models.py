@@ -1,9 +1,13 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.contrib.postgres.fields import ArrayField
 from django.core.exceptions import ValidationError
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+import hashlib
 import json
+import uuid
 
 User = get_user_model()
 
@@ -11,15 +15,37 @@ def validate_positive(value):
     if value <= 0:
         raise ValidationError(f"{value} must be positive.")
 
+class ContestQuerySet(models.QuerySet):
+    def refresh_totals(self):
+        """Recompute max_score and question_count of these contests in one UPDATE.
+
+        Also bumps ``updated_at``, since the questions changed.
+        """
+        questions = Question.objects.filter(contest=OuterRef('pk')).order_by().values('contest')
+        return self.update(
+            max_score=Coalesce(Subquery(questions.annotate(total=Sum('score')).values('total')), 0),
+            question_count=Coalesce(Subquery(questions.annotate(total=Count('id')).values('total')), 0),
+            updated_at=timezone.now()
+        )
+
+    def touch(self):
+        """Mark these contests as changed, e.g. after editing a question's test cases."""
+        return self.update(updated_at=timezone.now())
+
 class Contest(models.Model):
     name = models.CharField(max_length=255)
     start_datetime = models.DateTimeField()
     end_datetime = models.DateTimeField()
     duration_minutes = models.IntegerField(validators=[validate_positive])
     is_active = models.BooleanField(default=True)
+    # Kept in sync with the questions by contests.signals
+    max_score = models.IntegerField(default=0, editable=False)
+    question_count = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ContestQuerySet.as_manager()
+
     class Meta:
         ordering = ['start_datetime']
 
@@ -32,6 +58,12 @@ class Contest(models.Model):
         if self.start_datetime < timezone.now() and self.pk is None:
             raise ValidationError("Start date cannot be in the past for new contests.")
 
+class QuestionQuerySet(models.QuerySet):
+    def with_test_cases(self, invisible=True):
+        """Prefetch the questions' test cases (only the visible ones unless ``invisible``)."""
+        test_cases = TestCase.objects.all() if invisible else TestCase.objects.filter(is_hidden=False)
+        return self.prefetch_related(models.Prefetch('test_cases', queryset=test_cases))
+
 class Question(models.Model):
     QUESTION_TYPES = (
         ('mcq', 'Multiple Choice'),
@@ -46,16 +78,80 @@ class Question(models.Model):
     options = ArrayField(models.CharField(max_length=255), blank=True, null=True)
     answer = models.JSONField(blank=True, null=True)
     score = models.IntegerField(default=1, validators=[validate_positive])
-    visible_test_cases = models.JSONField(blank=True, null=True)
-    invisible_test_cases = models.JSONField(blank=True, null=True)
     time_limit_seconds = models.IntegerField(default=1, validators=[validate_positive], blank=True, null=True)
 
+    # Test cases are TestCase rows; prefetch them with Question.objects.with_test_cases()
+    objects = QuestionQuerySet.as_manager()
+
     class Meta:
         ordering = ['id']
 
     def __str__(self):
         return f"{self.question_type.upper()}: {self.description[:50]}"
 
+    def _stored_test_cases(self):
+        """The question's ``TestCase`` rows, read once per instance unless they were prefetched."""
+        if '_test_case_rows' not in self.__dict__:
+            self.__dict__['_test_case_rows'] = list(self.test_cases.all())
+        return self.__dict__['_test_case_rows']
+
+    def _get_test_cases(self, hidden):
+        pending = self.__dict__.get('_pending_test_cases', {})
+        if hidden in pending:
+            return pending[hidden]
+        if self.pk is None:
+            return None
+        return [
+            {'input': test_case.input, 'output': test_case.output}
+            for test_case in self._stored_test_cases() if test_case.is_hidden == hidden
+        ]
+
+    def _set_test_cases(self, hidden, test_cases):
+        self.__dict__.setdefault('_pending_test_cases', {})[hidden] = test_cases
+
+    # Read and assigned like the JSON lists they replaced; assigned lists are
+    # validated by clean() and written to TestCase rows by save().
+    @property
+    def visible_test_cases(self):
+        return self._get_test_cases(False)
+
+    @visible_test_cases.setter
+    def visible_test_cases(self, test_cases):
+        self._set_test_cases(False, test_cases)
+
+    @property
+    def invisible_test_cases(self):
+        return self._get_test_cases(True)
+
+    @invisible_test_cases.setter
+    def invisible_test_cases(self, test_cases):
+        self._set_test_cases(True, test_cases)
+
+    def has_pending_test_cases(self):
+        return bool(self.__dict__.get('_pending_test_cases'))
+
+    def test_case_hashes(self, hidden):
+        """Content hashes of the stored (or prefetched) test cases of one kind, in order."""
+        return [test_case.content_hash for test_case in self._stored_test_cases() if test_case.is_hidden == hidden]
+
+    def refresh_from_db(self, *args, **kwargs):
+        self.__dict__.pop('_test_case_rows', None)
+        super().refresh_from_db(*args, **kwargs)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if self.has_pending_test_cases():
+                TestCase.replace_all([self])
+
+    def delete(self, *args, **kwargs):
+        # Not a signal: a post_delete receiver would also run for every row of
+        # a QuerySet.delete() or contest cascade, one UPDATE per question.
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Contest.objects.filter(pk=self.contest_id).refresh_totals()
+        return result
+
     def clean(self):
         if self.question_type in ['mcq', 'msq']:
             if not self.options or len(self.options) < 2:
@@ -94,6 +190,76 @@ class Question(models.Model):
         if self.question_type != 'coding' and (self.visible_test_cases or self.invisible_test_cases):
             raise ValidationError("Test cases are only for coding questions.")
 
+def test_case_hash(input_data, output_data):
+    digest = hashlib.sha256()
+    digest.update(input_data.encode('utf-8') + b'\0')
+    digest.update(output_data.encode('utf-8'))
+    return digest.hexdigest()
+
+class TestCase(models.Model):
+    """One input/output pair of a coding question, stored outside the question row."""
+    question = models.ForeignKey(Question, related_name='test_cases', on_delete=models.CASCADE)
+    ordinal = models.IntegerField()
+    is_hidden = models.BooleanField(default=True)
+    input = models.TextField(blank=True)
+    output = models.TextField(blank=True)
+    content_hash = models.CharField(max_length=64, editable=False)
+
+    class Meta:
+        ordering = ['question', 'is_hidden', 'ordinal']
+        unique_together = ('question', 'ordinal')
+
+    def __str__(self):
+        return f"Test case {self.ordinal} of question {self.question_id}"
+
+    def save(self, *args, **kwargs):
+        self.content_hash = test_case_hash(self.input, self.output)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def next_ordinal(cls, question):
+        return (cls.objects.filter(question=question).aggregate(last=models.Max('ordinal'))['last'] or 0) + 1
+
+    @classmethod
+    def replace_all(cls, questions):
+        """Write the test cases assigned to saved ``questions`` with one DELETE and one INSERT.
+
+        A kind (visible or hidden) that was not assigned keeps its current cases.
+        """
+        questions = [question for question in questions if question.has_pending_test_cases()]
+        if not questions:
+            return
+        rows = []
+        for question in questions:
+            ordinal = 0
+            for hidden, test_cases in ((False, question.visible_test_cases), (True, question.invisible_test_cases)):
+                for test_case in test_cases or []:
+                    ordinal += 1
+                    input_text, output_text = str(test_case.get('input', '')), str(test_case.get('output', ''))
+                    rows.append(cls(
+                        question=question,
+                        ordinal=ordinal,
+                        is_hidden=hidden,
+                        input=input_text,
+                        output=output_text,
+                        content_hash=test_case_hash(input_text, output_text)
+                    ))
+        cls.objects.filter(question__in=questions).delete()
+        cls.objects.bulk_create(rows, batch_size=500)
+        for question in questions:
+            question.__dict__.pop('_pending_test_cases', None)
+            question.__dict__.pop('_test_case_rows', None)
+            getattr(question, '_prefetched_objects_cache', {}).pop('test_cases', None)
+
+class AttemptQuerySet(models.QuerySet):
+    def with_details(self):
+        """Load answers and test_case_results, which the default manager defers."""
+        return self.defer(None)
+
+class AttemptManager(models.Manager.from_queryset(AttemptQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().defer('answers', 'test_case_results')
+
 class Attempt(models.Model):
     contest = models.ForeignKey(Contest, related_name='attempts', on_delete=models.CASCADE)
     student = models.ForeignKey(User, related_name='attempts', on_delete=models.CASCADE)
@@ -105,13 +271,97 @@ class Attempt(models.Model):
     back_attempts = models.IntegerField(default=0)
     fullscreen_attempts = models.IntegerField(default=0)
 
+    # Answers and results can be large; load them with Attempt.objects.with_details()
+    objects = AttemptManager()
+
     class Meta:
+        # Also serves lookups by (contest, student[, is_final]) and by contest alone.
         unique_together = ('contest', 'student', 'is_final')
         ordering = ['-submitted_at']
+        indexes = [
+            # Leaderboards and finalize: a contest's final attempts by score.
+            models.Index(
+                fields=['contest', '-score'],
+                condition=models.Q(is_final=True),
+                name='attempt_final_contest_score'
+            ),
+            # student_scores: a student's final attempts, newest first.
+            models.Index(
+                fields=['student', '-submitted_at'],
+                condition=models.Q(is_final=True),
+                name='attempt_final_student_recent'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student.username} - {self.contest.name} - {self.score}"
 
     def clean(self):
         if self.student.role != 'student':
-            raise ValidationError("Only students can attempt contests.")
\ No newline at end of file
+            raise ValidationError("Only students can attempt contests.")
+
+class LeaderboardEntryQuerySet(models.QuerySet):
+    def ranked(self):
+        """Best score first; ties go to the earlier submission."""
+        return self.order_by('-score', 'submitted_at', 'id')
+
+class LeaderboardEntry(models.Model):
+    """A student's final attempt in a contest, kept up to date by contests.signals."""
+    contest = models.ForeignKey(Contest, related_name='leaderboard_entries', on_delete=models.CASCADE)
+    student = models.ForeignKey(User, related_name='leaderboard_entries', on_delete=models.CASCADE)
+    attempt = models.OneToOneField(Attempt, related_name='leaderboard_entry', on_delete=models.CASCADE)
+    score = models.IntegerField(default=0)
+    submitted_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = LeaderboardEntryQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('contest', 'student')
+        indexes = [
+            models.Index(fields=['contest', '-score', 'submitted_at', 'id'], name='leaderboard_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.contest_id} - {self.score}"
+
+    def rank(self):
+        """1-based position of this entry in its contest's ranking."""
+        ahead = models.Q(score__gt=self.score) | models.Q(score=self.score, submitted_at__lt=self.submitted_at) | \
+            models.Q(score=self.score, submitted_at=self.submitted_at, id__lt=self.id)
+        return LeaderboardEntry.objects.filter(ahead, contest_id=self.contest_id).count() + 1
+
+    @classmethod
+    def record(cls, attempt):
+        """Create or update the entry of a final ``attempt``."""
+        cls.objects.update_or_create(
+            contest_id=attempt.contest_id,
+            student_id=attempt.student_id,
+            defaults={'attempt': attempt, 'score': attempt.score, 'submitted_at': attempt.submitted_at}
+        )
+
+class GradingJob(models.Model):
+    """Background grading of the coding questions of a final attempt."""
+    STATUSES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    attempt = models.OneToOneField(Attempt, related_name='grading_job', on_delete=models.CASCADE)
+    language = models.CharField(max_length=20, default='python')
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    total_questions = models.IntegerField(default=0)
+    graded_questions = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.attempt} - {self.status} ({self.graded_questions}/{self.total_questions})"
@@ -0,0 +1,174 @@
+"""Question validation shared by the contest views, and question-bank import/export.
+
+A question bank is newline-delimited JSON: one question per line, in the
+same shape as a question of the ``create_contest`` payload::
+
+    {"type": "coding", "description": "...", "options": null, "answer": null,
+     "score": 5, "time_limit_seconds": 1,
+     "visible_test_cases": [{"input": "...", "output": "..."}],
+     "invisible_test_cases": [...]}
+
+Both directions stream: ``export_questions`` reads questions and test cases
+through server-side cursors and yields one line at a time, and
+``import_questions`` inserts in batches of ``IMPORT_BATCH_SIZE``, so memory
+use depends on the largest question rather than on the size of the bank.
+"""
+import itertools
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Contest, Question, TestCase
+
+IMPORT_BATCH_SIZE = 200
+EXPORT_CHUNK_SIZE = 500
+
+
+def parse_question(idx, q):
+    """Validate one question of a create/edit payload and return its field values."""
+    if q['type'] not in [choice[0] for choice in Question.QUESTION_TYPES]:
+        raise ValidationError(f"Question {idx + 1}: Invalid question type '{q['type']}'")
+
+    answer = q.get('answer')
+    if q['type'] in ['mcq', 'msq', 'blank']:
+        if answer is None:
+            raise ValidationError(f"Question {idx + 1} ({q['type']}): Answer is required.")
+        if q['type'] == 'mcq':
+            if isinstance(answer, list):
+                if len(answer) != 1:
+                    raise ValidationError(f"Question {idx + 1} (mcq): Answer must be a single option, got {answer}")
+                answer = answer[0]
+            if not isinstance(answer, str) or not answer:
+                raise ValidationError(f"Question {idx + 1} (mcq): Answer must be a non-empty string, got {answer}")
+            options = q.get('options', [])
+            if not options or answer not in options:
+                raise ValidationError(f"Question {idx + 1} (mcq): Answer '{answer}' must be one of the options: {options}")
+        elif q['type'] == 'msq':
+            if not isinstance(answer, list) or not answer:
+                raise ValidationError(f"Question {idx + 1} (msq): Answer must be a non-empty list, got {answer}")
+            options = q.get('options', [])
+            if not options or not all(ans in options for ans in answer):
+                raise ValidationError(f"Question {idx + 1} (msq): Answers {answer} must be a subset of options: {options}")
+        elif q['type'] == 'blank':
+            if isinstance(answer, list):
+                if len(answer) != 1:
+                    raise ValidationError(f"Question {idx + 1} (blank): Answer must be a single value, got {answer}")
+                answer = answer[0]
+            if not isinstance(answer, str) or not answer:
+                raise ValidationError(f"Question {idx + 1} (blank): Answer must be a non-empty string, got {answer}")
+    elif q['type'] == 'coding':
+        if answer is not None:
+            raise ValidationError(f"Question {idx + 1} (coding): Answer must be null, got {answer}")
+        visible_test_cases = q.get('visible_test_cases', [])
+        invisible_test_cases = q.get('invisible_test_cases', [])
+        if not (visible_test_cases or invisible_test_cases):
+            raise ValidationError(f"Question {idx + 1} (coding): Must have at least one visible or invisible test case.")
+        if not q.get('time_limit_seconds') or q['time_limit_seconds'] <= 0:
+            raise ValidationError(f"Question {idx + 1} (coding): Must have a positive time limit.")
+
+    return {
+        'question_type': q['type'],
+        'description': q['description'],
+        'options': q.get('options'),
+        'answer': answer,
+        'score': q.get('score', 1),
+        'visible_test_cases': q.get('visible_test_cases') if q['type'] == 'coding' else None,
+        'invisible_test_cases': q.get('invisible_test_cases') if q['type'] == 'coding' else None,
+        'time_limit_seconds': q.get('time_limit_seconds') if q['type'] == 'coding' else None
+    }
+
+
+def clean_questions(questions, numbers=None):
+    """Run model validation on every question before anything is written.
+
+    Errors name each question by its entry of ``numbers`` (its 1-based
+    position in the payload), or by its position in ``questions``.
+    ``contest`` is excluded: checking the foreign key would cost one query
+    per question, and the contest is the one being saved.
+    """
+    for number, question in zip(numbers or itertools.count(1), questions):
+        try:
+            question.full_clean(exclude=['contest'])
+        except ValidationError as e:
+            raise ValidationError(f"Question {number}: {'; '.join(e.messages)}")
+
+
+def create_questions(questions):
+    """Insert new questions and their test cases in bulk (no per-row save signals)."""
+    Question.objects.bulk_create(questions, batch_size=500)
+    TestCase.replace_all(questions)
+
+
+def question_line(question, visible_test_cases, invisible_test_cases):
+    return json.dumps({
+        'type': question.question_type,
+        'description': question.description,
+        'options': question.options,
+        'answer': question.answer,
+        'score': question.score,
+        'time_limit_seconds': question.time_limit_seconds,
+        'visible_test_cases': visible_test_cases,
+        'invisible_test_cases': invisible_test_cases,
+    }) + '\n'
+
+
+def export_questions(questions):
+    """Yield one NDJSON line per question in ``questions``, with its test cases."""
+    questions = questions.order_by('id')
+    test_cases = TestCase.objects.filter(question__in=questions.values('id')).order_by(
+        'question_id', 'is_hidden', 'ordinal'
+    ).values_list('question_id', 'is_hidden', 'input', 'output').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    test_case = next(test_cases, None)
+    for question in questions.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        cases = {False: [], True: []}
+        while test_case is not None and test_case[0] == question.id:
+            _, hidden, input_text, output_text = test_case
+            cases[hidden].append({'input': input_text, 'output': output_text})
+            test_case = next(test_cases, None)
+        if question.question_type == 'coding':
+            yield question_line(question, cases[False], cases[True])
+        else:
+            yield question_line(question, None, None)
+
+
+def import_questions(contest, lines):
+    """Add the questions of an NDJSON bank to ``contest``; return how many were added.
+
+    ``lines`` may yield ``str`` or ``bytes``. Everything is added in one
+    transaction; a bad line raises ``ValidationError`` naming its number and
+    nothing is imported.
+    """
+    imported = 0
+    batch = []
+
+    def flush():
+        nonlocal imported
+        create_questions(batch)
+        imported += len(batch)
+        batch.clear()
+
+    with transaction.atomic():
+        for number, line in enumerate(lines, start=1):
+            try:
+                line = line.decode('utf-8') if isinstance(line, bytes) else line
+                q = json.loads(line) if line.strip() else None
+            except ValueError:
+                raise ValidationError(f"Question {number}: Not a valid JSON line")
+            if q is None:
+                continue
+            if not isinstance(q, dict):
+                raise ValidationError(f"Question {number}: Must be a JSON object")
+            try:
+                fields = parse_question(number - 1, q)
+            except KeyError as e:
+                raise ValidationError(f"Question {number}: Missing required field {str(e)}")
+            question = Question(contest=contest, **fields)
+            clean_questions([question], [number])
+            batch.append(question)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+        Contest.objects.filter(pk=contest.pk).refresh_totals()
+    return imported
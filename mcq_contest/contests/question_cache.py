@@ -0,0 +1,49 @@
+"""The student-facing question list of a contest, cached per process.
+
+Every student opening a contest gets the same questions, so
+``attempt_contest`` serves them from the ``default`` (in-process) cache.
+An entry is stored with the contest's ``updated_at``, which changes
+whenever the contest or one of its questions or test cases is edited (see
+``ContestQuerySet.touch``), and is rebuilt when the two no longer match.
+This keeps every process consistent without having to reach the other
+processes' caches; ``edit_contest`` and ``delete_contest`` also drop the
+entry right away.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+
+def cache_key(contest_id):
+    return f'contest_questions:{contest_id}'
+
+
+def build_student_questions(contest):
+    questions = contest.questions.with_test_cases(invisible=False)
+    return [
+        {
+            'id': q.id,
+            'description': q.description,
+            'type': q.question_type,
+            'options': q.options,
+            'visible_test_cases': q.visible_test_cases,
+            'score': q.score,
+            'time_limit_seconds': q.time_limit_seconds,
+            'initial_code': ''
+        }
+        for q in questions
+    ]
+
+
+def student_questions(contest):
+    """Return the questions of ``contest`` as shown to students, without answers or hidden cases."""
+    cache = caches['default']
+    cached = cache.get(cache_key(contest.id))
+    if cached is not None and cached[0] == contest.updated_at:
+        return cached[1]
+    questions = build_student_questions(contest)
+    cache.set(cache_key(contest.id), (contest.updated_at, questions), settings.QUESTION_CACHE_TIMEOUT)
+    return questions
+
+
+def invalidate_student_questions(contest_id):
+    caches['default'].delete(cache_key(contest_id))
@@ -0,0 +1,86 @@
+"""Streaming export of a contest's final results.
+
+``export_results`` walks the contest's ``LeaderboardEntry`` rows in rank
+order through a server-side cursor (``RESULTS_CHUNK_SIZE`` rows at a time),
+joined to the student and the final attempt, and yields CSV or NDJSON one
+row at a time. Only the columns asked for are read from the database, so
+the heavy ``answers`` and ``test_case_results`` stay out of the query
+unless they are exported.
+"""
+import csv
+import json
+
+import pytz
+
+from .models import LeaderboardEntry
+
+RESULTS_CHUNK_SIZE = 1000
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# column: (fields to load, value of the column for an entry)
+COLUMNS = {
+    'rank': ((), None),
+    'student_name': (('student__username',), lambda entry, tz: entry.student.username),
+    'email': (('student__email',), lambda entry, tz: entry.student.email),
+    'score': (('score',), lambda entry, tz: entry.score),
+    'submitted_at': (('submitted_at',), lambda entry, tz: entry.submitted_at.astimezone(tz).isoformat()),
+    'back_attempts': (('attempt__back_attempts',), lambda entry, tz: entry.attempt.back_attempts),
+    'fullscreen_attempts': (('attempt__fullscreen_attempts',), lambda entry, tz: entry.attempt.fullscreen_attempts),
+    'answers': (('attempt__answers',), lambda entry, tz: entry.attempt.answers),
+    'test_case_results': (('attempt__test_case_results',), lambda entry, tz: entry.attempt.test_case_results),
+}
+
+DEFAULT_COLUMNS = ['rank', 'student_name', 'score', 'submitted_at']
+
+
+def parse_columns(value):
+    """Return the columns named in a comma-separated ``value``, or None if one is unknown."""
+    if not value:
+        return DEFAULT_COLUMNS
+    columns = [column.strip() for column in value.split(',') if column.strip()]
+    if not columns or any(column not in COLUMNS for column in columns):
+        return None
+    return columns
+
+
+class Echo:
+    """A file-like object whose ``write`` returns what it was given, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def result_rows(contest_id, columns):
+    """Yield one dict of ``columns`` per ranked final attempt of the contest."""
+    tz = pytz.timezone('Asia/Kolkata')
+    fields = ['id', 'contest_id', 'student_id', 'attempt_id']
+    for column in columns:
+        fields.extend(COLUMNS[column][0])
+    entries = LeaderboardEntry.objects.filter(contest_id=contest_id).only(*fields).ranked()
+    related = sorted({field.split('__')[0] for field in fields if '__' in field})
+    if related:
+        entries = entries.select_related(*related)
+    for rank, entry in enumerate(entries.iterator(chunk_size=RESULTS_CHUNK_SIZE), start=1):
+        yield {
+            column: rank if column == 'rank' else COLUMNS[column][1](entry, tz)
+            for column in columns
+        }
+
+
+def export_results(contest_id, columns, output_format):
+    """Yield the contest's results as lines of ``output_format`` ('csv' or 'ndjson')."""
+    if output_format == 'ndjson':
+        for row in result_rows(contest_id, columns):
+            yield json.dumps(row) + '\n'
+        return
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in result_rows(contest_id, columns):
+        yield writer.writerow([
+            json.dumps(value) if isinstance(value, (dict, list)) else value
+            for value in row.values()
+        ])
@@ -0,0 +1,28 @@
+"""Keep denormalized data up to date: the question totals on ``Contest``
+and the ``LeaderboardEntry`` of every final attempt.
+
+Only ``Model.save()`` sends these signals. ``bulk_create``,
+``bulk_update`` and ``QuerySet.update`` do not, and deletes are not
+handled here at all: a ``post_delete`` receiver would make Django send
+the signal for every row of a ``QuerySet.delete()`` or cascade.
+``Question.delete()`` refreshes its contest's totals itself; code that
+writes in bulk or deletes through a queryset calls
+``Contest.objects.filter(...).refresh_totals()`` or
+``LeaderboardEntry.record()`` itself. Deleting an attempt removes its
+entry through the cascade.
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Attempt, Contest, LeaderboardEntry, Question
+
+
+@receiver(post_save, sender=Question)
+def refresh_contest_totals(sender, instance, **kwargs):
+    Contest.objects.filter(pk=instance.contest_id).refresh_totals()
+
+
+@receiver(post_save, sender=Attempt)
+def record_leaderboard_entry(sender, instance, **kwargs):
+    if instance.is_final:
+        LeaderboardEntry.record(instance)
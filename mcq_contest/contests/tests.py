@@ -1,3 +1,78 @@
-from django.test import TestCase
+import os
+import sys
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.db import connection
+from django.test import SimpleTestCase, TestCase as DjangoTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from .judge.sessions import HarnessSession, ProcessSession, python_harness_command
+from .models import Attempt, Contest
+
+
+class PythonHarnessTests(SimpleTestCase):
+    """The warm Python runner must print what a fresh interpreter prints, case after case."""
+
+    programs = {
+        'open_fd_0': 'print(sum(map(int, open(0).read().split())))',
+        'stdin_buffer': 'import sys\nprint(sum(map(int, sys.stdin.buffer.read().split())))',
+        'os_write_fd_1': 'import os\nos.write(1, str(sum(map(int, input().split()))).encode())',
+        'open_fd_1': "open(1, 'w').write(str(sum(map(int, input().split()))))",
+        'close_stdout': 'import sys\nprint(sum(map(int, input().split())))\nsys.stdout.close()',
+        'print_then_os_write': "import os\nprint('a')\nos.write(1, b'b')",
+    }
+    inputs = ['1 2', '3 4 5', '10']
+
+    def run_all(self, session):
+        try:
+            return [session.run_case(stdin, 5)['stdout'] for stdin in self.inputs]
+        finally:
+            session.close()
+
+    def test_harness_matches_process(self):
+        limits = {'output_bytes': 1024 * 1024}
+        for name, source in self.programs.items():
+            with self.subTest(program=name), tempfile.TemporaryDirectory() as workdir:
+                path = os.path.join(workdir, 'solution.py')
+                with open(path, 'w') as f:
+                    f.write(source)
+                expected = self.run_all(ProcessSession([sys.executable, path], cwd=workdir, limits=limits))
+                actual = self.run_all(HarnessSession(python_harness_command(sys.executable, path), cwd=workdir, limits=limits))
+                self.assertEqual(actual, expected)
+
+
+class StudentDashboardQueryTests(DjangoTestCase):
+    """The dashboard is built from one query however many contests are running."""
+
+    def setUp(self):
+        self.student = User.objects.create_user(username='student', role='student', email='student@example.com', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def add_contests(self, count):
+        now = timezone.now()
+        for _ in range(count):
+            contest = Contest.objects.create(
+                name='Contest', start_datetime=now - timedelta(hours=1), end_datetime=now + timedelta(hours=1),
+                duration_minutes=60
+            )
+            Attempt.objects.create(contest=contest, student=self.student, answers={})
+
+    def dashboard_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/contests/student/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        return len(response.data['contests']), len(queries)
+
+    def test_query_count_does_not_grow_with_contests(self):
+        self.add_contests(1)
+        contests, queries_for_one = self.dashboard_queries()
+        self.assertEqual(contests, 1)
+        self.add_contests(9)
+        contests, queries_for_many = self.dashboard_queries()
+        self.assertEqual(contests, 10)
+        self.assertEqual(queries_for_many, queries_for_one)
@@ -4,13 +4,21 @@ from . import views
 urlpatterns = [
     path('student/dashboard/', views.student_dashboard, name='student_dashboard'),
     path('student/attempt/<int:contest_id>/', views.attempt_contest, name='attempt_contest'),
+    path('student/attempt/<int:contest_id>/autosave/', views.autosave_attempt, name='autosave_attempt'),
     path('student/scores/', views.student_scores, name='student_scores'),
     path('admin/dashboard/', views.admin_dashboard, name='admin_dashboard'),
     path('admin/contest/create/', views.create_contest, name='create_contest'),
     path('admin/contest/edit/<int:contest_id>/', views.edit_contest, name='edit_contest'),
     path('admin/contest/delete/<int:contest_id>/', views.delete_contest, name='delete_contest'),
     path('admin/contest/view/<int:contest_id>/', views.view_contest, name='view_contest'),
+    path('admin/contest/<int:contest_id>/questions/export/', views.export_contest_questions, name='export_contest_questions'),
+    path('admin/contest/<int:contest_id>/questions/import/', views.import_contest_questions, name='import_contest_questions'),
+    path('admin/question/<int:question_id>/test_cases/', views.question_test_cases, name='question_test_cases'),
+    path('admin/test_case/<int:test_case_id>/', views.delete_test_case, name='delete_test_case'),
     path('admin/contest/leaderboard/<int:contest_id>/', views.contest_leaderboard, name='contest_leaderboard'),
+    path('admin/contest/<int:contest_id>/results/export/', views.export_contest_results, name='export_contest_results'),
     path('contests/<int:contest_id>/submit', views.submit_contest, name='submit_contest'),
+    path('grading/<uuid:job_id>/', views.grading_status, name='grading_status'),
     path('code_execution/run', views.run_code, name='run_code'),
+    path('code_execution/run/stream', views.run_code_stream, name='run_code_stream'),
 ]
\ No newline at end of file
@@ -5,18 +5,35 @@ from rest_framework import status
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from datetime import datetime
-from django.db import transaction
+from django.db import models, transaction
+from django.db.models import Count, Exists, OuterRef
+from django.db.models.functions import Length
+from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
 import pytz
-import subprocess
-import tempfile
-import os
-from .models import Contest, Question, Attempt
+import itertools
+import json
+from django.conf import settings
+from .models import Contest, Question, Attempt, GradingJob, LeaderboardEntry, TestCase, test_case_hash
+from .grading import process_job
+from .answer_key import answer_key_for
+from .question_cache import student_questions, invalidate_student_questions
+from .question_bank import parse_question, clean_questions, create_questions, export_questions, import_questions
+from .results_export import COLUMNS, FORMATS, parse_columns, export_results
+from . import autosave
+from .judge.client import run_job, stream_job, JudgeError, JudgeBusy, JudgeSuperseded
+from .judge.languages import LANGUAGES
 from django.contrib.auth import get_user_model
 import logging
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+ADMIN_DASHBOARD_PAGE_SIZE = 20
+ADMIN_DASHBOARD_MAX_PAGE_SIZE = 100
+LEADERBOARD_PAGE_SIZE = 50
+LEADERBOARD_MAX_PAGE_SIZE = 500
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def student_dashboard(request):
@@ -30,17 +47,18 @@ def student_dashboard(request):
         is_active=True,
         start_datetime__lte=now,
         end_datetime__gte=now
-    )
+    ).annotate(
+        attempted=Exists(Attempt.objects.filter(contest=OuterRef('pk'), student=user))
+    ).only('id', 'name', 'start_datetime', 'end_datetime', 'is_active')
 
     contest_list = []
     for contest in contests:
-        attempt = Attempt.objects.filter(contest=contest, student=user).first()
         contest_list.append({
             'contest_id': contest.id,
             'name': contest.name,
             'start_datetime': contest.start_datetime.astimezone(tz).strftime('%Y-%m-%dT%H:%M'),
             'end_datetime': contest.end_datetime.astimezone(tz).strftime('%Y-%m-%dT%H:%M'),
-            'status': 'Ongoing' if not attempt else 'Attempted',
+            'status': 'Attempted' if contest.attempted else 'Ongoing',
             'is_active': contest.is_active
         })
     return Response({'contests': contest_list}, status=status.HTTP_200_OK)
@@ -67,7 +85,9 @@ def attempt_contest(request, contest_id):
         return Response({'error': 'Contest is not within its active period'}, status=status.HTTP_400_BAD_REQUEST)
 
     # Check if student has an ongoing attempt
-    attempt = Attempt.objects.filter(contest=contest, student=user, is_final=False).first()
+    attempt = Attempt.objects.with_details().defer('test_case_results').filter(
+        contest=contest, student=user, is_final=False
+    ).first()
     if not attempt:
         # Create a new attempt to mark start time
         attempt = Attempt(
@@ -78,6 +98,7 @@ def attempt_contest(request, contest_id):
             is_final=False
         )
         attempt.save()
+        autosave.forget_draft(contest.id, user.id)
 
     # Calculate time remaining based on attempt start time
     time_elapsed = (now - attempt.submitted_at).total_seconds()
@@ -86,29 +107,45 @@ def attempt_contest(request, contest_id):
     time_to_end = (contest.end_datetime - now).total_seconds()
     time_remaining = min(time_remaining, max(0, time_to_end))
 
-    questions = contest.questions.all()
-    question_data = [
-        {
-            'id': q.id,
-            'description': q.description,
-            'type': q.question_type,
-            'options': q.options,
-            'visible_test_cases': q.visible_test_cases,
-            'score': q.score,
-            'time_limit_seconds': q.time_limit_seconds,
-            'initial_code': ''
-        }
-        for q in questions
-    ]
+    question_data = student_questions(contest)
 
     return Response({
         'id': contest.id,
         'name': contest.name,
         'duration_minutes': contest.duration_minutes,
         'time_remaining': time_remaining,
-        'questions': question_data
+        'questions': question_data,
+        'saved_answers': {**(attempt.answers or {}), **autosave.buffer.buffered(attempt.id)}
     }, status=status.HTTP_200_OK)
 
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def autosave_attempt(request, contest_id):
+    """Save changed answers ({question_id: answer}) of the student's draft attempt.
+
+    The answers are buffered and written in batches (see contests.autosave).
+    """
+    user = request.user
+    if user.role != 'student':
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+    answers = request.data.get('answers')
+    if not isinstance(answers, dict) or not answers:
+        return Response({'error': 'Answers must be an object of question ID to answer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    draft = autosave.draft_for(contest_id, user.id)
+    if draft is None:
+        return Response({'error': 'No attempt in progress'}, status=status.HTTP_404_NOT_FOUND)
+    if timezone.now() > draft['deadline']:
+        return Response({'error': 'Attempt time is over'}, status=status.HTTP_400_BAD_REQUEST)
+    for question_id in answers:
+        if not str(question_id).isdigit() or int(question_id) not in draft['question_ids']:
+            return Response({'error': f'Invalid question ID: {question_id}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    autosave.buffer.add(draft['attempt_id'], {str(question_id): answer for question_id, answer in answers.items()})
+    return Response({'message': 'Answers saved'}, status=status.HTTP_202_ACCEPTED)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def submit_contest(request, contest_id):
@@ -138,72 +175,30 @@ def submit_contest(request, contest_id):
     if not isinstance(submission, list):
         return Response({'error': 'Submission must be a list'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Evaluate submission
+    # Grade objective questions now; coding questions are graded by a GradingJob
     total_score = 0
     test_case_results = []
     answers_dict = {}
-    questions = contest.questions.all()
-    question_dict = {str(q.id): q for q in questions}
+    answer_key = answer_key_for(contest)
+    language = data.get('language', 'python')
 
-    with transaction.atomic():
-        for sub in submission:
-            question_id = str(sub.get('question_id'))
-            submitted_answer = sub.get('answer')
-
-            if question_id not in question_dict:
-                logger.error(f"Invalid question ID: {question_id}")
-                return Response(
-                    {'error': f'Invalid question ID: {question_id}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            question = question_dict[question_id]
-            is_correct = False
-            result = {
-                'question_id': question_id,
-                'type': question.question_type,
-                'submitted_answer': submitted_answer,
-                'correct_answer': question.answer,
-                'passed': False,
-                'score': 0,
-            }
-
-            try:
-                if question.question_type in ['mcq', 'blank']:
-                    # Normalize answers
-                    correct_answer = question.answer[0] if isinstance(question.answer, list) else question.answer
-                    submitted_answer = submitted_answer[0] if isinstance(submitted_answer, list) and len(submitted_answer) == 1 else submitted_answer
-                    is_correct = str(submitted_answer).strip() == str(correct_answer).strip()
-                elif question.question_type == 'msq':
-                    submitted_set = set(submitted_answer) if isinstance(submitted_answer, list) else set()
-                    correct_set = set(question.answer) if isinstance(question.answer, list) else set([question.answer])
-                    is_correct = submitted_set == correct_set
-                elif question.question_type == 'coding':
-                    all_test_cases = (question.visible_test_cases or []) + (question.invisible_test_cases or [])
-                    if not all_test_cases:
-                        result['error'] = 'No test cases available'
-                    else:
-                        code = submitted_answer or ''
-                        test_results = evaluate_coding_question(
-                            code=code,
-                            language=data.get('language', 'python'),
-                            test_cases=all_test_cases,
-                            time_limit=question.time_limit_seconds or 1
-                        )
-                        result['test_results'] = test_results
-                        is_correct = all(tr['passed'] for tr in test_results)
-            except Exception as e:
-                logger.error(f"Error evaluating question {question_id}: {str(e)}")
-                result['error'] = str(e)
-
-            if is_correct:
-                total_score += question.score
-                result['passed'] = True
-                result['score'] = question.score
-
-            test_case_results.append(result)
-            answers_dict[question_id] = submitted_answer
+    for sub in submission:
+        question_id = str(sub.get('question_id'))
+
+        if question_id not in answer_key:
+            logger.error(f"Invalid question ID: {question_id}")
+            return Response(
+                {'error': f'Invalid question ID: {question_id}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
+        result, answers_dict[question_id] = answer_key.grade(question_id, sub.get('answer'))
+        total_score += result['score']
+        test_case_results.append(result)
+
+    pending_count = sum(1 for r in test_case_results if r['pending'])
+
+    with transaction.atomic():
         # Check for existing final attempt
         existing_attempt = Attempt.objects.filter(contest=contest, student=user, is_final=True).first()
         if existing_attempt:
@@ -223,6 +218,13 @@ def submit_contest(request, contest_id):
             )
             attempt.full_clean()
             attempt.save()
+            job = GradingJob.objects.create(
+                attempt=attempt,
+                language=language,
+                total_questions=pending_count,
+                status='pending' if pending_count else 'completed',
+                finished_at=None if pending_count else timezone.now()
+            )
         except ValidationError as e:
             logger.error(f"ValidationError saving attempt: {str(e)}")
             return Response({'error': f'Failed to save attempt: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
@@ -230,134 +232,76 @@ def submit_contest(request, contest_id):
             logger.error(f"Error saving attempt: {str(e)}")
             return Response({'error': f'Failed to save attempt: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    if pending_count and not settings.GRADING_ASYNC:
+        process_job(job)
+        attempt.refresh_from_db()
+        job.refresh_from_db()
+
     return Response(
         {
             'message': 'Contest submitted successfully',
-            'score': total_score,
-            'max_score': sum(q.score for q in questions),
-            'test_case_results': test_case_results
+            'job_id': str(job.id),
+            'grading_status': job.status,
+            'score': attempt.score,
+            'max_score': contest.max_score,
+            'test_case_results': attempt.test_case_results
         },
-        status=status.HTTP_200_OK
+        status=status.HTTP_202_ACCEPTED if job.status in ['pending', 'running'] else status.HTTP_200_OK
     )
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def grading_status(request, job_id):
+    """Report grading progress of a submission."""
+    try:
+        job = GradingJob.objects.select_related('attempt__contest').get(id=job_id)
+    except GradingJob.DoesNotExist:
+        return Response({'error': 'Grading job not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    attempt = job.attempt
+    if request.user.role != 'admin' and attempt.student_id != request.user.id:
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+    data = {
+        'job_id': str(job.id),
+        'status': job.status,
+        'graded_questions': job.graded_questions,
+        'total_questions': job.total_questions,
+        'score': attempt.score,
+        'error': job.error or None,
+    }
+    if job.status in ['completed', 'failed']:
+        data['max_score'] = attempt.contest.max_score
+        data['test_case_results'] = attempt.test_case_results
+    return Response(data, status=status.HTTP_200_OK)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def student_scores(request):
-    """Retrieve a student's attempt history."""
+    """Retrieve a student's attempt history (with per-question results if ``?details=true``)."""
     user = request.user
     if user.role != 'student':
         return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
 
-    attempts = Attempt.objects.filter(student=user, is_final=True)
+    include_results = request.query_params.get('details') == 'true'
+    attempts = Attempt.objects.filter(student=user, is_final=True).select_related('contest')
+    if include_results:
+        attempts = attempts.with_details()
     attempt_list = []
     tz = pytz.timezone('Asia/Kolkata')
     for attempt in attempts:
-        attempt_list.append({
+        entry = {
             'contest_id': attempt.contest.id,
             'contest_name': attempt.contest.name,
             'score': attempt.score,
-            'max_score': sum(q.score for q in attempt.contest.questions.all()),
-            'submitted_at': attempt.submitted_at.astimezone(tz).isoformat(),
-            'test_case_results': attempt.test_case_results
-        })
+            'max_score': attempt.contest.max_score,
+            'submitted_at': attempt.submitted_at.astimezone(tz).isoformat()
+        }
+        if include_results:
+            entry['test_case_results'] = attempt.test_case_results
+        attempt_list.append(entry)
     return Response({'attempts': attempt_list}, status=status.HTTP_200_OK)
 
-def evaluate_coding_question(code, language, test_cases, time_limit=1):
-    """Evaluate code against test cases, return pass/fail results."""
-    results = []
-    temp_dir = tempfile.mkdtemp()
-    try:
-        if language == 'python':
-            file_ext = '.py'
-            cmd = ['python', '{file}']
-        elif language == 'cpp':
-            file_ext = '.cpp'
-            output_file = os.path.join(temp_dir, 'a.out')
-            compile_cmd = ['g++', '{file}', '-o', output_file]
-            cmd = [output_file]
-        elif language == 'java':
-            file_ext = '.java'
-            class_name = 'Solution'
-            compile_cmd = ['javac', '{file}']
-            cmd = ['java', '-cp', temp_dir, class_name]
-        elif language == 'c':
-            file_ext = '.c'
-            output_file = os.path.join(temp_dir, 'a.out')
-            compile_cmd = ['gcc', '{file}', '-o', output_file]
-            cmd = [output_file]
-        else:
-            return [{
-                'input': None,
-                'output': None,
-                'expected_output': None,
-                'passed': False,
-                'error': f'Unsupported language: {language}'
-            }]
-
-        source_file = os.path.join(temp_dir, f'solution{file_ext}')
-        with open(source_file, 'w') as f:
-            f.write(code)
-
-        if language in ['cpp', 'c', 'java']:
-            compile_cmd = [arg.format(file=source_file) for arg in compile_cmd]
-            compile_result = subprocess.run(
-                compile_cmd,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if compile_result.returncode != 0:
-                return [{
-                    'input': None,
-                    'output': None,
-                    'expected_output': None,
-                    'passed': False,
-                    'error': f'Compilation failed: {compile_result.stderr}'
-                }]
-
-        for test_case in test_cases:
-            try:
-                cmd_exec = [arg.format(file=source_file) for arg in cmd]
-                process = subprocess.run(
-                    cmd_exec,
-                    input=test_case['input'],
-                    text=True,
-                    capture_output=True,
-                    timeout=time_limit
-                )
-                output = process.stdout.strip()
-                expected = test_case['output'].strip()
-                results.append({
-                    'input': test_case['input'],
-                    'output': output,
-                    'expected_output': expected,
-                    'passed': output == expected,
-                    'error': None
-                })
-            except subprocess.TimeoutExpired:
-                results.append({
-                    'input': test_case['input'],
-                    'output': None,
-                    'expected_output': test_case['output'],
-                    'passed': False,
-                    'error': 'Time limit exceeded'
-                })
-            except subprocess.SubprocessError as e:
-                results.append({
-                    'input': test_case['input'],
-                    'output': None,
-                    'expected_output': test_case['output'],
-                    'passed': False,
-                    'error': str(e)
-                })
-
-        return results
-    finally:
-        for root, _, files in os.walk(temp_dir):
-            for file in files:
-                os.remove(os.path.join(root, file))
-        os.rmdir(temp_dir)
-
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def admin_dashboard(request):
@@ -368,11 +312,29 @@ def admin_dashboard(request):
 
     tz = pytz.timezone('Asia/Kolkata')
     now = timezone.now().astimezone(tz)
-    contests = Contest.objects.all()
-
+    status_filter = request.query_params.get('status')
+    try:
+        page_size = min(int(request.query_params.get('page_size', ADMIN_DASHBOARD_PAGE_SIZE)), ADMIN_DASHBOARD_MAX_PAGE_SIZE)
+    except ValueError:
+        return Response({'error': 'page_size must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+    contests = Contest.objects.only(
+        'id', 'name', 'start_datetime', 'end_datetime', 'max_score'
+    ).annotate(
+        participant_count=Count('attempts__student', distinct=True)
+    ).order_by('start_datetime', 'id')
+    if status_filter == 'upcoming':
+        contests = contests.filter(start_datetime__gt=now)
+    elif status_filter == 'ongoing':
+        contests = contests.filter(start_datetime__lte=now, end_datetime__gte=now)
+    elif status_filter == 'completed':
+        contests = contests.filter(end_datetime__lt=now)
+    elif status_filter:
+        return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
+
+    page = Paginator(contests, max(page_size, 1)).get_page(request.query_params.get('page'))
     contest_list = []
-    for contest in contests:
-        participant_count = Attempt.objects.filter(contest=contest).values('student').distinct().count()
+    for contest in page:
         status_str = (
             'Upcoming' if now < contest.start_datetime else
             'Ongoing' if now <= contest.end_datetime else
@@ -383,11 +345,34 @@ def admin_dashboard(request):
             'name': contest.name,
             'start_datetime': contest.start_datetime.astimezone(tz).strftime('%Y-%m-%dT%H:%M'),
             'end_datetime': contest.end_datetime.astimezone(tz).strftime('%Y-%m-%dT%H:%M'),
-            'max_score': sum(q.score for q in contest.questions.all()),
+            'max_score': contest.max_score,
             'status': status_str,
-            'participant_count': participant_count
+            'participant_count': contest.participant_count
         })
-    return Response({'contests': contest_list}, status=status.HTTP_200_OK)
+    return Response({
+        'contests': contest_list,
+        'page': page.number,
+        'total_pages': page.paginator.num_pages,
+        'total_contests': page.paginator.count
+    }, status=status.HTTP_200_OK)
+
+QUESTION_FIELDS = ['question_type', 'description', 'options', 'answer', 'score', 'time_limit_seconds']
+
+
+def test_cases_changed(question, fields):
+    """Whether the test cases from ``parse_question`` differ from those stored for ``question``.
+
+    Compared by content hash, so the stored inputs and outputs are not loaded.
+    """
+    for hidden, key in ((False, 'visible_test_cases'), (True, 'invisible_test_cases')):
+        test_cases = fields[key] or []
+        if not all(isinstance(tc, dict) for tc in test_cases):
+            return True
+        hashes = [test_case_hash(str(tc.get('input', '')), str(tc.get('output', ''))) for tc in test_cases]
+        if hashes != question.test_case_hashes(hidden):
+            return True
+    return False
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -415,74 +400,16 @@ def create_contest(request):
         )
         contest.full_clean()
 
-        question_data = []
-        for idx, q in enumerate(data.get('questions', [])):
-            logger.info(f"Processing question {idx + 1}: {q}")
-            if q['type'] not in [choice[0] for choice in Question.QUESTION_TYPES]:
-                raise ValidationError(f"Question {idx + 1}: Invalid question type '{q['type']}'")
-
-            answer = q.get('answer')
-            if q['type'] in ['mcq', 'msq', 'blank']:
-                if answer is None:
-                    raise ValidationError(f"Question {idx + 1} ({q['type']}): Answer is required.")
-                if q['type'] == 'mcq':
-                    if isinstance(answer, list):
-                        if len(answer) != 1:
-                            raise ValidationError(f"Question {idx + 1} (mcq): Answer must be a single option, got {answer}")
-                        answer = answer[0]
-                    if not isinstance(answer, str) or not answer:
-                        raise ValidationError(f"Question {idx + 1} (mcq): Answer must be a non-empty string, got {answer}")
-                elif q['type'] == 'msq':
-                    if not isinstance(answer, list) or not answer:
-                        raise ValidationError(f"Question {idx + 1} (msq): Answer must be a non-empty list, got {answer}")
-                elif q['type'] == 'blank':
-                    if isinstance(answer, list):
-                        if len(answer) != 1:
-                            raise ValidationError(f"Question {idx + 1} (blank): Answer must be a single value, got {answer}")
-                        answer = answer[0]
-                    if not isinstance(answer, str) or not answer:
-                        raise ValidationError(f"Question {idx + 1} (blank): Answer must be a non-empty string, got {answer}")
-            elif q['type'] == 'coding':
-                if answer is not None:
-                    raise ValidationError(f"Question {idx + 1} (coding): Answer must be null, got {answer}")
-                visible_test_cases = q.get('visible_test_cases', [])
-                invisible_test_cases = q.get('invisible_test_cases', [])
-                if not (visible_test_cases or invisible_test_cases):
-                    raise ValidationError(f"Question {idx + 1} (coding): Must have at least one visible or invisible test case.")
-                if not q.get('time_limit_seconds') or q['time_limit_seconds'] <= 0:
-                    raise ValidationError(f"Question {idx + 1} (coding): Must have a positive time limit.")
-
-            question_data.append({
-                'question_type': q['type'],
-                'description': q['description'],
-                'options': q.get('options'),
-                'answer': answer,
-                'score': q.get('score', 1),
-                'visible_test_cases': q.get('visible_test_cases') if q['type'] == 'coding' else None,
-                'invisible_test_cases': q.get('invisible_test_cases') if q['type'] == 'coding' else None,
-                'time_limit_seconds': q.get('time_limit_seconds') if q['type'] == 'coding' else None
-            })
+        questions = [
+            Question(contest=contest, **parse_question(idx, q))
+            for idx, q in enumerate(data.get('questions', []))
+        ]
+        clean_questions(questions)
 
         with transaction.atomic():
             contest.save()
-            questions = []
-            for q_data in question_data:
-                question = Question(
-                    contest=contest,
-                    question_type=q_data['question_type'],
-                    description=q_data['description'],
-                    options=q_data['options'],
-                    answer=q_data['answer'],
-                    score=q_data['score'],
-                    visible_test_cases=q_data['visible_test_cases'],
-                    invisible_test_cases=q_data['invisible_test_cases'],
-                    time_limit_seconds=q_data['time_limit_seconds']
-                )
-                question.full_clean()
-                questions.append(question)
-            
-            for question in questions:
-                question.save()
+            create_questions(questions)
+            Contest.objects.filter(pk=contest.pk).refresh_totals()
 
         return Response({'message': 'Contest created', 'contest_id': contest.id}, status=status.HTTP_201_CREATED)
 
@@ -496,109 +423,148 @@ def create_contest(request):
         logger.error(f"ValidationError: {str(e)}")
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+def build_run_job(data):
+    """Return (job, error_response) for a run_code request body."""
+    code = data.get('code')
+    language = data.get('language')
+
+    if not code or not language:
+        return None, Response(
+            {'error': 'Code and language are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if language not in LANGUAGES:
+        return None, Response(
+            {'error': 'Unsupported language'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    test_cases = data.get('test_cases', [])
+    if not isinstance(test_cases, list) or not all(isinstance(tc, dict) for tc in test_cases):
+        # The judge also accepts stored TestCase ids; students may only send inline cases.
+        return None, Response(
+            {'error': 'Test cases must be objects with input and output'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return {
+        'code': code,
+        'language': language,
+        'test_cases': test_cases,
+        'time_limit': data.get('time_limit', 1)
+    }, None
+
+
+def run_owner(request):
+    """Runs by the same student on the same question replace each other in the judge."""
+    return f"{request.user.id}:{request.data.get('question_id', '')}"
+
+
+def judge_error_response(error):
+    if isinstance(error, JudgeSuperseded):
+        return Response({'error': str(error)}, status=status.HTTP_409_CONFLICT)
+    if isinstance(error, JudgeBusy):
+        return Response(
+            {'error': str(error)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': '2'}
+        )
+    logger.error(f"Judge unavailable: {str(error)}")
+    return Response({'error': 'Code execution is unavailable'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+def format_run_result(test_case, result):
+    return {
+        'input': test_case.get('input'),
+        'output': result['output'],
+        'expected_output': test_case.get('output'),
+        'passed': result['passed'],
+        'error': result['error'] or result['stderr'],
+        'cpu_time': result['cpu_time'],
+        'peak_rss_kb': result['peak_rss_kb']
+    }
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def run_code(request):
     """Run code against provided test cases and return output or error."""
-    data = request.data
-    code = data.get('code')
-    language = data.get('language')
-    test_cases = data.get('test_cases', [])
-    time_limit = data.get('time_limit', 1)
+    job, error_response = build_run_job(request.data)
+    if error_response:
+        return error_response
 
-    if not code or not language:
+    try:
+        outcome = run_job(job, owner=run_owner(request))
+    except JudgeError as e:
+        return judge_error_response(e)
+
+    if outcome['compile_error'] is not None:
         return Response(
-            {'error': 'Code and language are required'},
+            {'error': 'Compilation failed', 'details': outcome['compile_error']},
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    results = []
-    temp_dir = tempfile.mkdtemp()
+    results = [
+        format_run_result(test_case, result)
+        for test_case, result in zip(job['test_cases'], outcome['results'])
+    ]
+    return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+def sse_event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def run_code_stream(request):
+    """Like run_code, but stream compile status and each test case result as Server-Sent Events.
+
+    Events: ``compile`` ({ok, error}), ``result`` ({index, ...result}),
+    ``error`` ({error}) and finally ``done``. Closing the connection, or
+    starting another run for the same ``question_id``, cancels the cases
+    that have not finished yet.
+    """
+    job, error_response = build_run_job(request.data)
+    if error_response:
+        return error_response
+
+    events = stream_job(job, owner=run_owner(request))
     try:
-        if language == 'python':
-            file_ext = '.py'
-            cmd = ['python', '{file}']
-        elif language == 'cpp':
-            file_ext = '.cpp'
-            output_file = os.path.join(temp_dir, 'a.out')
-            compile_cmd = ['g++', '{file}', '-o', output_file]
-            cmd = [output_file]
-        elif language == 'java':
-            file_ext = '.java'
-            class_name = 'Solution'
-            compile_cmd = ['javac', '{file}']
-            cmd = ['java', '-cp', temp_dir, class_name]
-        elif language == 'c':
-            file_ext = '.c'
-            output_file = os.path.join(temp_dir, 'a.out')
-            compile_cmd = ['gcc', '{file}', '-o', output_file]
-            cmd = [output_file]
-        else:
-            return Response(
-                {'error': 'Unsupported language'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        # Busy/unavailable judges surface on the first event, while a proper status can still be sent.
+        first = next(events)
+    except JudgeError as e:
+        return judge_error_response(e)
 
-        source_file = os.path.join(temp_dir, f'solution{file_ext}')
-        with open(source_file, 'w') as f:
-            f.write(code)
-
-        if language in ['cpp', 'c', 'java']:
-            compile_cmd = [arg.format(file=source_file) for arg in compile_cmd]
-            compile_result = subprocess.run(
-                compile_cmd,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if compile_result.returncode != 0:
-                return Response(
-                    {'error': 'Compilation failed', 'details': compile_result.stderr},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-        for test_case in test_cases:
-            try:
-                cmd_exec = [arg.format(file=source_file) for arg in cmd]
-                process = subprocess.run(
-                    cmd_exec,
-                    input=test_case.get('input', ''),
-                    text=True,
-                    capture_output=True,
-                    timeout=time_limit
-                )
-                output = process.stdout.strip()
-                error = process.stderr.strip() if process.stderr else None
-                results.append({
-                    'input': test_case.get('input'),
-                    'output': output,
-                    'expected_output': test_case.get('output'),
-                    'passed': output == test_case.get('output', '').strip(),
-                    'error': error
-                })
-            except subprocess.TimeoutExpired:
-                results.append({
-                    'input': test_case.get('input'),
-                    'output': None,
-                    'expected_output': test_case.get('output'),
-                    'passed': False,
-                    'error': 'Time limit exceeded'
-                })
-            except subprocess.SubprocessError as e:
-                results.append({
-                    'input': test_case.get('input'),
-                    'output': None,
-                    'expected_output': test_case.get('output'),
-                    'passed': False,
-                    'error': str(e)
-                })
-
-        return Response({'results': results}, status=status.HTTP_200_OK)
-    finally:
-        for root, _, files in os.walk(temp_dir):
-            for file in files:
-                os.remove(os.path.join(root, file))
-        os.rmdir(temp_dir)
+    def stream():
+        try:
+            for event in itertools.chain([first], events):
+                kind = event['event']
+                if kind == 'compile':
+                    yield sse_event('compile', {'ok': event['ok'], 'error': event['error']})
+                elif kind == 'result':
+                    result = format_run_result(job['test_cases'][event['index']], event['result'])
+                    yield sse_event('result', {'index': event['index'], **result})
+                elif kind == 'error':
+                    yield sse_event('error', {'error': event['error']})
+                elif kind == 'done':
+                    yield sse_event('done', {})
+        except JudgeSuperseded as e:
+            yield sse_event('error', {'error': str(e)})
+            yield sse_event('done', {})
+        except JudgeError as e:
+            logger.error(f"Judge stream interrupted: {str(e)}")
+            yield sse_event('error', {'error': 'Code execution is unavailable'})
+            yield sse_event('done', {})
+        finally:
+            # Reached on client disconnect too; closing the judge stream cancels the job.
+            events.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
@@ -629,80 +595,51 @@ def edit_contest(request, contest_id):
         contest.duration_minutes = int(data.get('duration_minutes', 60))
         contest.full_clean()
 
-        question_data = []
+        existing = {
+            question.id: question
+            for question in contest.questions.prefetch_related(models.Prefetch(
+                'test_cases', queryset=TestCase.objects.only('id', 'question_id', 'is_hidden', 'ordinal', 'content_hash')
+            ))
+        }
+        new_questions, changed_questions, retested_questions, kept_ids = [], [], [], set()
+        new_numbers, changed_numbers = [], []  # payload positions, for error messages
         for idx, q in enumerate(data.get('questions', [])):
-            logger.info(f"Processing question {idx + 1}: {q}")
-            if q['type'] not in [choice[0] for choice in Question.QUESTION_TYPES]:
-                raise ValidationError(f"Question {idx + 1}: Invalid question type '{q['type']}'")
-
-            answer = q.get('answer')
-            if q['type'] in ['mcq', 'msq', 'blank']:
-                if answer is None:
-                    raise ValidationError(f"Question {idx + 1} ({q['type']}): Answer is required.")
-                if q['type'] == 'mcq':
-                    if isinstance(answer, list):
-                        if len(answer) != 1:
-                            raise ValidationError(f"Question {idx + 1} (mcq): Answer must be a single option, got {answer}")
-                        answer = answer[0]
-                    if not isinstance(answer, str) or not answer:
-                        raise ValidationError(f"Question {idx + 1} (mcq): Answer must be a non-empty string, got {answer}")
-                    options = q.get('options', [])
-                    if not options or answer not in options:
-                        raise ValidationError(f"Question {idx + 1} (mcq): Answer '{answer}' must be one of the options: {options}")
-                elif q['type'] == 'msq':
-                    if not isinstance(answer, list) or not answer:
-                        raise ValidationError(f"Question {idx + 1} (msq): Answer must be a non-empty list, got {answer}")
-                    options = q.get('options', [])
-                    if not options or not all(ans in options for ans in answer):
-                        raise ValidationError(f"Question {idx + 1} (msq): Answers {answer} must be a subset of options: {options}")
-                elif q['type'] == 'blank':
-                    if isinstance(answer, list):
-                        if len(answer) != 1:
-                            raise ValidationError(f"Question {idx + 1} (blank): Answer must be a single value, got {answer}")
-                        answer = answer[0]
-                    if not isinstance(answer, str) or not answer:
-                        raise ValidationError(f"Question {idx + 1} (blank): Answer must be a non-empty string, got {answer}")
-            elif q['type'] == 'coding':
-                if answer is not None:
-                    raise ValidationError(f"Question {idx + 1} (coding): Answer must be null, got {answer}")
-                visible_test_cases = q.get('visible_test_cases', [])
-                invisible_test_cases = q.get('invisible_test_cases', [])
-                if not (visible_test_cases or invisible_test_cases):
-                    raise ValidationError(f"Question {idx + 1} (coding): Must have at least one visible or invisible test case.")
-                if not q.get('time_limit_seconds') or q['time_limit_seconds'] <= 0:
-                    raise ValidationError(f"Question {idx + 1} (coding): Must have a positive time limit.")
-
-            question_data.append({
-                'question_type': q['type'],
-                'description': q['description'],
-                'options': q.get('options'),
-                'answer': answer,
-                'score': q.get('score', 1),
-                'visible_test_cases': q.get('visible_test_cases') if q['type'] == 'coding' else None,
-                'invisible_test_cases': q.get('invisible_test_cases') if q['type'] == 'coding' else None,
-                'time_limit_seconds': q.get('time_limit_seconds') if q['type'] == 'coding' else None
-            })
+            fields = parse_question(idx, q)
+            question_id = q.get('id')
+            if question_id is None:
+                new_questions.append(Question(contest=contest, **fields))
+                new_numbers.append(idx + 1)
+                continue
+            question = existing.get(question_id)
+            if question is None or question_id in kept_ids:
+                raise ValidationError(f"Question {idx + 1}: Unknown question id {question_id}")
+            kept_ids.add(question_id)
+            retest = test_cases_changed(question, fields)
+            if not retest and all(getattr(question, field) == fields[field] for field in QUESTION_FIELDS):
+                continue
+            for field, value in fields.items():
+                setattr(question, field, value)
+            changed_questions.append(question)
+            changed_numbers.append(idx + 1)
+            if retest:
+                retested_questions.append(question)
+        clean_questions(new_questions + changed_questions, new_numbers + changed_numbers)
+        removed_ids = [question_id for question_id in existing if question_id not in kept_ids]
 
         with transaction.atomic():
             contest.save()
-            questions = []
-            for q_data in question_data:
-                question = Question(
-                    contest=contest,
-                    question_type=q_data['question_type'],
-                    description=q_data['description'],
-                    options=q_data['options'],
-                    answer=q_data['answer'],
-                    score=q_data['score'],
-                    visible_test_cases=q_data['visible_test_cases'],
-                    invisible_test_cases=q_data['invisible_test_cases'],
-                    time_limit_seconds=q_data['time_limit_seconds']
-                )
-                question.full_clean()
-                questions.append(question)
-            
-            for question in questions:
-                question.save()
+            if removed_ids:
+                Question.objects.filter(id__in=removed_ids).delete()
+            if changed_questions:
+                Question.objects.bulk_update(changed_questions, QUESTION_FIELDS, batch_size=500)
+                TestCase.replace_all(retested_questions)
+            create_questions(new_questions)
+            Contest.objects.filter(pk=contest.pk).refresh_totals()
+        invalidate_student_questions(contest.id)
+        logger.info(
+            f"Contest {contest.id} edited: {len(new_questions)} added, "
+            f"{len(changed_questions)} changed, {len(removed_ids)} removed"
+        )
 
         return Response({'message': 'Contest updated successfully'}, status=status.HTTP_200_OK)
 
@@ -728,6 +665,7 @@ def delete_contest(request, contest_id):
     try:
         contest = Contest.objects.get(id=contest_id)
         contest.delete()
+        invalidate_student_questions(contest_id)
         return Response({'message': 'Contest deleted'}, status=status.HTTP_200_OK)
     except Contest.DoesNotExist:
         return Response({'error': 'Contest not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -744,7 +682,7 @@ def view_contest(request, contest_id):
     try:
         contest = Contest.objects.get(id=contest_id)
         tz = pytz.timezone('Asia/Kolkata')
-        questions = contest.questions.all()
+        questions = contest.questions.with_test_cases()
         contest_data = {
             'contest_id': contest.id,
             'name': contest.name,
@@ -765,15 +703,156 @@ def view_contest(request, contest_id):
                     'time_limit_seconds': q.time_limit_seconds
                 } for q in questions
             ],
-            'max_score': sum(q.score for q in questions)
+            'max_score': contest.max_score
         }
         return Response(contest_data, status=status.HTTP_200_OK)
     except Contest.DoesNotExist:
         return Response({'error': 'Contest not found'}, status=status.HTTP_404_NOT_FOUND)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_contest_questions(request, contest_id):
+    """Stream the contest's questions as an NDJSON question bank (see contests.question_bank)."""
+    user = request.user
+    logger.info(f"Export questions request by user {user.username} with role {user.role}")
+    if user.role != 'admin':
+        logger.info(f"Unauthorized access by user {user.username} with role {user.role}")
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+    contest = Contest.objects.filter(id=contest_id).only('id').first()
+    if contest is None:
+        return Response({'error': 'Contest not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    response = StreamingHttpResponse(export_questions(contest.questions.all()), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="contest-{contest.id}-questions.ndjson"'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_contest_questions(request, contest_id):
+    """Add the questions of an NDJSON question bank to the contest.
+
+    The bank is the request body, or the ``file`` field of a multipart
+    upload; either way it is read line by line.
+    """
+    user = request.user
+    logger.info(f"Import questions request by user {user.username} with role {user.role}")
+    if user.role != 'admin':
+        logger.info(f"Unauthorized access by user {user.username} with role {user.role}")
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+    contest = Contest.objects.filter(id=contest_id).first()
+    if contest is None:
+        return Response({'error': 'Contest not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.content_type.startswith('multipart/'):
+        lines = request.FILES.get('file')
+    else:
+        lines = request.stream
+    if lines is None:
+        return Response({'error': 'No question bank was uploaded'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        imported = import_questions(contest, lines)
+    except ValidationError as e:
+        logger.error(f"ValidationError: {str(e)}")
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    invalidate_student_questions(contest.id)
+    logger.info(f"Imported {imported} questions into contest {contest.id}")
+    return Response({'message': 'Questions imported', 'imported': imported}, status=status.HTTP_201_CREATED)
+
+
+def read_test_case_text(request, field):
+    """Return an upload or form field as text; large cases arrive as files."""
+    upload = request.FILES.get(field)
+    if upload is not None:
+        return upload.read().decode('utf-8')
+    return request.data.get(field, '')
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def question_test_cases(request, question_id):
+    user = request.user
+    logger.info(f"Test cases request by user {user.username} with role {user.role}")
+    if user.role != 'admin':
+        logger.info(f"Unauthorized access by user {user.username} with role {user.role}")
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        question = Question.objects.get(id=question_id)
+    except Question.DoesNotExist:
+        return Response({'error': 'Question not found'}, status=status.HTTP_404_NOT_FOUND)
+    if question.question_type != 'coding':
+        return Response({'error': 'Only coding questions have test cases'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.method == 'GET':
+        test_cases = question.test_cases.annotate(
+            input_size=Length('input'), output_size=Length('output')
+        ).values('id', 'ordinal', 'is_hidden', 'content_hash', 'input_size', 'output_size')
+        return Response({'question_id': question.id, 'test_cases': list(test_cases)}, status=status.HTTP_200_OK)
+
+    try:
+        input_text = read_test_case_text(request, 'input')
+        output_text = read_test_case_text(request, 'output')
+    except UnicodeDecodeError:
+        return Response({'error': 'Test case files must be UTF-8 text'}, status=status.HTTP_400_BAD_REQUEST)
+    is_hidden = str(request.data.get('is_hidden', 'true')).lower() not in ('false', '0')
+
+    with transaction.atomic():
+        Question.objects.select_for_update().filter(pk=question.pk).first()
+        test_case = TestCase.objects.create(
+            question=question,
+            ordinal=TestCase.next_ordinal(question),
+            is_hidden=is_hidden,
+            input=input_text,
+            output=output_text
+        )
+        Contest.objects.filter(pk=question.contest_id).touch()
+    logger.info(f"Added test case {test_case.id} to question {question.id}")
+    return Response({
+        'id': test_case.id,
+        'ordinal': test_case.ordinal,
+        'is_hidden': test_case.is_hidden,
+        'content_hash': test_case.content_hash
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def delete_test_case(request, test_case_id):
+    user = request.user
+    logger.info(f"Delete test case request by user {user.username} with role {user.role}")
+    if user.role != 'admin':
+        logger.info(f"Unauthorized access by user {user.username} with role {user.role}")
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+    contest_id = TestCase.objects.filter(id=test_case_id).values_list('question__contest_id', flat=True).first()
+    if contest_id is None:
+        return Response({'error': 'Test case not found'}, status=status.HTTP_404_NOT_FOUND)
+    with transaction.atomic():
+        TestCase.objects.filter(id=test_case_id).delete()
+        Contest.objects.filter(pk=contest_id).touch()
+    return Response({'message': 'Test case deleted'}, status=status.HTTP_200_OK)
+
+def leaderboard_entry_data(entry, rank, tz):
+    return {
+        'rank': rank,
+        'student_name': entry.student.username,
+        'score': entry.score,
+        'submitted_at': entry.submitted_at.astimezone(tz).isoformat()
+    }
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def contest_leaderboard(request, contest_id):
+    """A page of the ranked leaderboard, or one student's rank with ``?student=<username>``.
+
+    Paged with ``page``/``page_size`` or ``offset``/``page_size``;
+    per-question results are included with ``?details=true``.
+    """
     user = request.user
     logger.info(f"Leaderboard request by user {user.username} with role {user.role}")
     if user.role != 'admin':
@@ -781,27 +860,88 @@ def contest_leaderboard(request, contest_id):
         return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
 
     try:
-        contest = Contest.objects.get(id=contest_id)
-        attempts = contest.attempts.filter(is_final=True).order_by('-score')
-        tz = pytz.timezone('Asia/Kolkata')
-        leaderboard = [
-            {
-                'student_name': attempt.student.username,
-                'score': attempt.score,
-                'submitted_at': attempt.submitted_at.astimezone(tz).isoformat(),
-                'test_case_results': attempt.test_case_results
-            } for attempt in attempts
-        ]
-        contest_data = {
-            'contest_id': contest.id,
-            'name': contest.name,
-            'max_score': sum(q.score for q in contest.questions.all()),
-            'participant_count': len(leaderboard)
-        }
-        return Response({'contest': contest_data, 'leaderboard': leaderboard}, status=status.HTTP_200_OK)
+        contest = Contest.objects.only('id', 'name', 'max_score').get(id=contest_id)
     except Contest.DoesNotExist:
         return Response({'error': 'Contest not found'}, status=status.HTTP_404_NOT_FOUND)
 
+    params = request.query_params
+    try:
+        page_size = max(min(int(params.get('page_size', LEADERBOARD_PAGE_SIZE)), LEADERBOARD_MAX_PAGE_SIZE), 1)
+        page_number = max(int(params.get('page', 1)), 1)
+        offset = max(int(params['offset']), 0) if 'offset' in params else (page_number - 1) * page_size
+    except ValueError:
+        return Response({'error': 'page, page_size and offset must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+    include_results = params.get('details') == 'true'
+    tz = pytz.timezone('Asia/Kolkata')
+
+    entries = LeaderboardEntry.objects.filter(contest=contest).select_related('student').only(
+        'id', 'score', 'submitted_at', 'attempt_id', 'contest_id', 'student__username'
+    ).ranked()
+    contest_data = {
+        'contest_id': contest.id,
+        'name': contest.name,
+        'max_score': contest.max_score,
+        'participant_count': entries.count()
+    }
+
+    if 'student' in params:
+        entry = entries.filter(student__username=params['student']).first()
+        if entry is None:
+            return Response({'error': 'Student has no final attempt'}, status=status.HTTP_404_NOT_FOUND)
+        entry_data = leaderboard_entry_data(entry, entry.rank(), tz)
+        if include_results:
+            entry_data['test_case_results'] = Attempt.objects.with_details().only(
+                'test_case_results'
+            ).get(id=entry.attempt_id).test_case_results
+        return Response({'contest': contest_data, 'entry': entry_data}, status=status.HTTP_200_OK)
+
+    page = list(entries[offset:offset + page_size])
+    leaderboard = [leaderboard_entry_data(entry, offset + index + 1, tz) for index, entry in enumerate(page)]
+    if include_results:
+        results = dict(
+            Attempt.objects.with_details().filter(id__in=[entry.attempt_id for entry in page])
+            .values_list('id', 'test_case_results')
+        )
+        for entry, entry_data in zip(page, leaderboard):
+            entry_data['test_case_results'] = results.get(entry.attempt_id)
+    return Response({
+        'contest': contest_data,
+        'leaderboard': leaderboard,
+        'offset': offset,
+        'page_size': page_size,
+        'page': offset // page_size + 1,
+        'total_pages': max(-(-contest_data['participant_count'] // page_size), 1)
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_contest_results(request, contest_id):
+    """Stream every ranked final attempt as CSV or NDJSON.
+
+    ``?output=csv|ndjson`` picks the format (CSV by default) and
+    ``?columns=rank,student_name,...`` the columns (see contests.results_export).
+    """
+    user = request.user
+    logger.info(f"Export results request by user {user.username} with role {user.role}")
+    if user.role != 'admin':
+        logger.info(f"Unauthorized access by user {user.username} with role {user.role}")
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+    contest = Contest.objects.filter(id=contest_id).only('id').first()
+    if contest is None:
+        return Response({'error': 'Contest not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    output_format = request.query_params.get('output', 'csv')
+    if output_format not in FORMATS:
+        return Response({'error': f"output must be one of: {', '.join(FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+    columns = parse_columns(request.query_params.get('columns'))
+    if columns is None:
+        return Response({'error': f"columns must be chosen from: {', '.join(COLUMNS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(export_results(contest.id, columns, output_format), content_type=FORMATS[output_format])
+    response['Content-Disposition'] = f'attachment; filename="contest-{contest.id}-results.{output_format}"'
+    return response
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def finalize_contest(request, contest_id):
@@ -822,12 +962,12 @@ def finalize_contest(request, contest_id):
         return Response({'error': 'Contest is still ongoing'}, status=status.HTTP_400_BAD_REQUEST)
 
     students = User.objects.filter(attempts__contest=contest).distinct()
-    max_score = sum(q.score for q in contest.questions.all())
+    max_score = contest.max_score
 
     for student in students:
         attempts = Attempt.objects.filter(contest=contest, student=student, is_final=False)
         if attempts.exists():
-            highest_attempt = attempts.order_by('-score').first()
+            highest_attempt = attempts.with_details().order_by('-score').first()
             highest_attempt.is_final = True
             highest_attempt.test_case_results['objective_score'] = max_score
             highest_attempt.save()
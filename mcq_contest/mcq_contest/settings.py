@@ -110,6 +110,69 @@ DB_NAME = "mcq_contest_db"
 client = pymongo.MongoClient(MONGO_URI)
 MONGO_DB = client[DB_NAME]  # Renamed to MONGO_DB for clarity
 
+# Code execution judge (start it with `python manage.py run_judge`)
+JUDGE_SOCKET_PATH = os.getenv('JUDGE_SOCKET_PATH', '/tmp/mcq_judge/judge.sock')
+JUDGE_WORKERS = {  # pre-forked worker processes per language
+    'python': int(os.getenv('JUDGE_PYTHON_WORKERS', 4)),
+    'cpp': int(os.getenv('JUDGE_CPP_WORKERS', 2)),
+    'c': int(os.getenv('JUDGE_C_WORKERS', 2)),
+    'java': int(os.getenv('JUDGE_JAVA_WORKERS', 2)),
+}
+JUDGE_QUEUE_SIZE = int(os.getenv('JUDGE_QUEUE_SIZE', 8))  # waiting jobs per language before rejecting
+JUDGE_CONNECT_TIMEOUT = 2
+JUDGE_RESPONSE_TIMEOUT = 60
+JUDGE_CACHE_DIR = os.getenv('JUDGE_CACHE_DIR', '/tmp/mcq_judge/artifacts')  # compiled C/C++/Java submissions
+JUDGE_CACHE_MAX_BYTES = int(os.getenv('JUDGE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+JUDGE_WORKSPACE_ROOT = os.getenv(  # scratch directories for submissions; RAM-backed where available
+    'JUDGE_WORKSPACE_ROOT', '/dev/shm/mcq_judge' if os.path.isdir('/dev/shm') else '/tmp/mcq_judge/workspaces'
+)
+JUDGE_WORKSPACES = int(os.getenv('JUDGE_WORKSPACES', 4))  # kept ready per judge process
+JUDGE_CASE_PARALLELISM = int(os.getenv('JUDGE_CASE_PARALLELISM', 2))  # test cases run at once per submission
+JUDGE_PYTHON_HARNESS = True  # run every Python test case in one warm interpreter
+JUDGE_JAVA_RUNNER = True  # run every Java test case in one JVM, loading Solution per case
+JUDGE_LIMITS = {  # applied to every submission process; None disables a limit
+    'memory_bytes': int(os.getenv('JUDGE_MEMORY_BYTES', 256 * 1024 * 1024)),
+    'file_bytes': 16 * 1024 * 1024,
+    'output_bytes': int(os.getenv('JUDGE_OUTPUT_BYTES', 1024 * 1024)),
+}
+JUDGE_LANGUAGE_LIMITS = {
+    # The JVM reserves far more address space than it uses; its heap is
+    # capped with -Xmx instead.
+    'java': {'memory_bytes': None},
+}
+JUDGE_INPROCESS = os.getenv('JUDGE_INPROCESS') == '1'  # run code inside the web process (local development only)
+
+# Background grading of coding answers (start workers with `python manage.py run_grader`)
+GRADING_ASYNC = os.getenv('GRADING_ASYNC', '1') == '1'  # set to 0 to grade inside submit_contest
+GRADING_POLL_SECONDS = 1
+GRADING_FAIL_FAST = False  # stop judging a coding answer at its first failing test case
+GRADING_JOB_STALE_SECONDS = 600  # re-queue running jobs whose worker stopped reporting
+GRADING_CACHE_TIMEOUT = 7 * 24 * 60 * 60  # how long judged verdicts of unchanged answers are reused
+
+# Live leaderboard over WebSockets (ws/contests/<id>/leaderboard/, served by mcq_contest.asgi)
+LEADERBOARD_PUSH_SECONDS = 1  # how often each watched contest is checked for changes
+LEADERBOARD_VIEWER_QUEUE = 32  # pushes buffered per viewer before it is sent a fresh snapshot instead
+
+# Draft autosave (contests.autosave): buffered per process and written in batches
+AUTOSAVE_FLUSH_SECONDS = 5  # longest time an autosaved answer waits before it is written
+AUTOSAVE_MAX_PENDING = 500  # write at once when this many drafts are waiting
+AUTOSAVE_DRAFT_CACHE_TIMEOUT = 60 * 60  # how long a student's draft lookup is reused
+
+QUESTION_CACHE_TIMEOUT = 60 * 60  # how long a contest's student-facing questions and answer key stay cached
+
+# Caches; 'grading' is shared by the web and grader processes, so it lives on disk
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'grading': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('GRADING_CACHE_DIR', '/tmp/mcq_contest/grading_cache'),
+        'TIMEOUT': GRADING_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
 # Static files and general config
 TIME_ZONE = 'Asia/Kolkata'
 USE_TZ = True